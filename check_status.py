@@ -5,11 +5,16 @@ and download the result if it's complete.
 """
 import os
 import sys
-import json
 import time
+import shutil
 import argparse
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
+from json_utils import parse_json, format_json
+from http_utils import without_retries
 
 # Load environment variables
 load_dotenv()
@@ -20,6 +25,117 @@ SUNO_API_KEY = os.getenv("SUNO_API_KEY")
 # API endpoints
 SUNO_API_BASE_URL = "https://apibox.erweima.ai/api/v1"
 
+# Suno API request headers, kept off SESSION (see download_song.py)
+HEADERS = {
+    "Content-Type": "application/json",
+    "Accept": "application/json",
+    "Authorization": f"Bearer {SUNO_API_KEY}"
+}
+
+# Read size for streaming audio downloads to disk
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+
+# Task statuses that mean the song is ready or that generation failed
+_DONE = frozenset({'complete', 'finished', 'success', 'done'})
+_FAIL = frozenset({'failed', 'error'})
+
+# Status endpoint formats, tried concurrently
+STATUS_ENDPOINTS = (
+    SUNO_API_BASE_URL + "/generate/status?taskId={task_id}",
+    SUNO_API_BASE_URL + "/generate/result?taskId={task_id}",
+    SUNO_API_BASE_URL + "/task/{task_id}"
+)
+
+# Pooled session shared by the status probes and the download
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=20,
+    max_retries=Retry(
+        total=5,
+        backoff_factor=1,
+        status_forcelist=[429, 500, 502, 503, 504],
+        raise_on_status=False
+    )
+))
+
+# SESSION's pools without its retries, so the racing probes end within their timeout
+PROBE_SESSION = without_retries(SESSION)
+
+def probe_endpoints(endpoints, headers):
+    """
+    Query all endpoints concurrently and return the first successful response.
+    
+    Args:
+        endpoints: List of endpoint URLs to try
+        headers: Request headers to send
+        
+    Returns:
+        tuple: (parsed JSON, endpoint) of the first 200 response, or (None, None)
+    """
+    executor = ThreadPoolExecutor(max_workers=len(endpoints))
+    try:
+        futures = {}
+        for endpoint in endpoints:
+            print(f"Trying endpoint: {endpoint}")
+            futures[executor.submit(PROBE_SESSION.get, endpoint, headers=headers, timeout=30)] = endpoint
+        
+        for future in as_completed(futures):
+            endpoint = futures[future]
+            try:
+                response = future.result()
+            except requests.exceptions.RequestException as e:
+                print(f"Error with endpoint {endpoint}: {e}")
+                continue
+            
+            if response.status_code == 200:
+                print(f"Success with endpoint: {endpoint}")
+                return parse_json(response.content), endpoint
+            else:
+                print(f"Failed with status {response.status_code}: {endpoint}")
+                print(f"Response: {response.text}")
+    finally:
+        # Return as soon as there is an answer. Slower probes still run to
+        # completion (at most their timeout, as they don't retry) and are
+        # joined when the script exits.
+        executor.shutdown(wait=False, cancel_futures=True)
+    
+    return None, None
+
+def scan_task_details(obj):
+    """
+    Find the first status and audio URL fields in a nested JSON object.
+    
+    Both fields are collected in one walk over the tree, in document order,
+    which stops as soon as both have been found.
+    
+    Args:
+        obj: JSON object to search
+        
+    Returns:
+        tuple: (status, audio URL), either of which may be None
+    """
+    status = None
+    audio_url = None
+    # Exact type checks suffice for parsed JSON
+    dict_type, list_type = dict, list
+    stack = [obj]
+    pop, extend = stack.pop, stack.extend
+    while stack:
+        node = pop()
+        node_type = type(node)
+        if node_type is dict_type:
+            if not status:
+                status = node.get('status')
+            if not audio_url:
+                audio_url = node.get('audioUrl') or node.get('audio_url')
+            if status and audio_url:
+                break
+            extend(reversed(node.values()))
+        elif node_type is list_type:
+            extend(reversed(node))
+    return status, audio_url
+
 def check_task_status(task_id, output_file=None, debug=False):
     """
     Check the status of a task and download the result if complete.
@@ -29,34 +145,9 @@ def check_task_status(task_id, output_file=None, debug=False):
         output_file: Path to save the audio file if task is complete
         debug: Whether to print debug information
     """
-    headers = {
-        "Content-Type": "application/json",
-        "Accept": "application/json",
-        "Authorization": f"Bearer {SUNO_API_KEY}"
-    }
-    
-    # Try different endpoint formats
-    endpoints = [
-        f"{SUNO_API_BASE_URL}/generate/status?taskId={task_id}",
-        f"{SUNO_API_BASE_URL}/generate/result?taskId={task_id}",
-        f"{SUNO_API_BASE_URL}/task/{task_id}"
-    ]
-    
-    task_details = None
-    successful_endpoint = None
-    
-    for endpoint in endpoints:
-        print(f"Trying endpoint: {endpoint}")
-        response = requests.get(endpoint, headers=headers)
-        
-        if response.status_code == 200:
-            print(f"Success with endpoint: {endpoint}")
-            task_details = response.json()
-            successful_endpoint = endpoint
-            break
-        else:
-            print(f"Failed with status {response.status_code}: {endpoint}")
-            print(f"Response: {response.text}")
+    # Try different endpoint formats concurrently
+    endpoints = [template.format(task_id=task_id) for template in STATUS_ENDPOINTS]
+    task_details, successful_endpoint = probe_endpoints(endpoints, HEADERS)
     
     if not task_details:
         print("Failed to get task details from any endpoint.")
@@ -64,40 +155,27 @@ def check_task_status(task_id, output_file=None, debug=False):
     
     if debug:
         print("Full API response:")
-        print(json.dumps(task_details, indent=2))
+        print(format_json(task_details))
     
     # Try to extract status using different possible paths
     status = None
+    scanned = None
     try:
         # Check various possible paths to status
         status = task_details.get('data', {}).get('status')
         if not status:
             status = task_details.get('status')
         if not status:
-            # Search for any status field recursively in the JSON
-            def find_status(obj):
-                if isinstance(obj, dict):
-                    if 'status' in obj:
-                        return obj['status']
-                    for k, v in obj.items():
-                        result = find_status(v)
-                        if result:
-                            return result
-                elif isinstance(obj, list):
-                    for item in obj:
-                        result = find_status(item)
-                        if result:
-                            return result
-                return None
-            
-            status = find_status(task_details)
+            # Search for any status field in the JSON
+            scanned = scan_task_details(task_details)
+            status = scanned[0]
     except Exception as e:
         print(f"Error extracting status: {e}")
     
     print(f"Task status: {status}")
     
     # Check for completion
-    if status == 'complete' or status == 'finished' or status == 'success':
+    if status in _DONE:
         print("Task is complete!")
         
         # Try to extract audio URL
@@ -113,25 +191,11 @@ def check_task_status(task_id, output_file=None, debug=False):
                 audio_url = task_details.get('data', {}).get('audioUrl')
             
             if not audio_url:
-                # Search recursively for audioUrl or audio_url
-                def find_audio_url(obj):
-                    if isinstance(obj, dict):
-                        if 'audioUrl' in obj:
-                            return obj['audioUrl']
-                        if 'audio_url' in obj:
-                            return obj['audio_url']
-                        for k, v in obj.items():
-                            result = find_audio_url(v)
-                            if result:
-                                return result
-                    elif isinstance(obj, list):
-                        for item in obj:
-                            result = find_audio_url(item)
-                            if result:
-                                return result
-                    return None
-                
-                audio_url = find_audio_url(task_details)
+                # Search for audioUrl or audio_url anywhere in the JSON,
+                # reusing the status scan if one already ran
+                if scanned is None:
+                    scanned = scan_task_details(task_details)
+                audio_url = scanned[1]
         except Exception as e:
             print(f"Error extracting audio URL: {e}")
         
@@ -140,16 +204,17 @@ def check_task_status(task_id, output_file=None, debug=False):
             
             if output_file:
                 print(f"Downloading to {output_file}...")
-                response = requests.get(audio_url)
-                
-                if response.status_code == 200:
-                    with open(output_file, 'wb') as f:
-                        f.write(response.content)
-                    print(f"Download complete. File saved to {output_file}")
-                    return True
-                else:
-                    print(f"Failed to download audio: {response.status_code}")
-                    return False
+                # Stream straight to disk so the whole song is never held in memory
+                with SESSION.get(audio_url, stream=True, timeout=60) as response:
+                    if response.status_code == 200:
+                        response.raw.decode_content = True
+                        with open(output_file, 'wb') as f:
+                            shutil.copyfileobj(response.raw, f, DOWNLOAD_CHUNK_SIZE)
+                        print(f"Download complete. File saved to {output_file}")
+                        return True
+                    else:
+                        print(f"Failed to download audio: {response.status_code}")
+                        return False
             else:
                 print("No output file specified. Use --output to download the file.")
                 print(f"Audio URL: {audio_url}")
@@ -157,7 +222,7 @@ def check_task_status(task_id, output_file=None, debug=False):
         else:
             print("No audio URL found in the response.")
             return False
-    elif status == 'failed' or status == 'error':
+    elif status in _FAIL:
         print("Task failed.")
         return False
     else:
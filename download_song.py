@@ -5,11 +5,18 @@ This script retries multiple times with different download strategies.
 """
 import os
 import sys
-import json
 import time
 import argparse
+import hashlib
+import re
+import threading
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
+from json_utils import parse_json, format_json
+from http_utils import without_retries
 
 # Load environment variables
 load_dotenv()
@@ -20,10 +27,154 @@ SUNO_API_KEY = os.getenv("SUNO_API_KEY")
 # API endpoints
 SUNO_API_BASE_URL = "https://apibox.erweima.ai/api/v1"
 
+# Suno API request headers; SESSION also fetches audio from the CDN, so they
+# are sent only with the API calls
+HEADERS = {
+    "Content-Type": "application/json",
+    "Accept": "application/json",
+    "Authorization": f"Bearer {SUNO_API_KEY}"
+}
+
+# Task statuses that mean the song is ready or that generation failed
+_DONE = frozenset({'complete', 'finished', 'success', 'done'})
+_FAIL = frozenset({'failed', 'error'})
+
+# Status endpoint formats, tried concurrently
+STATUS_ENDPOINTS = (
+    SUNO_API_BASE_URL + "/generate/status?taskId={task_id}",
+    SUNO_API_BASE_URL + "/generate/result?taskId={task_id}",
+    SUNO_API_BASE_URL + "/task/{task_id}",
+    SUNO_API_BASE_URL + "/generate/{task_id}",
+    SUNO_API_BASE_URL + "/generate/audio?taskId={task_id}"
+)
+
+# One pooled session for the whole run
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=20,
+    max_retries=Retry(
+        total=5,
+        backoff_factor=1,
+        status_forcelist=[429, 500, 502, 503, 504],
+        raise_on_status=False
+    )
+))
+
+# Worker threads for concurrent endpoint probes, kept for the whole run so
+# each poll reuses the same threads and pooled connections
+PROBE_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="probe")
+
+# SESSION's pools without its retries, for the racing probes: a losing probe
+# must end within its timeout because the interpreter joins PROBE_EXECUTOR's
+# threads before exiting
+PROBE_SESSION = without_retries(SESSION)
+
+# Per-task memo of the status endpoint that answered and the JSON path where
+# the status field was found, so later polls skip probing and path discovery
+_ENDPOINT_CACHE = {}
+_STATUS_PATH_CACHE = {}
+
+# Per-task (ETag, body digest, parsed details, raw body) from the last status
+# response, used for conditional requests and to skip re-parsing an unchanged body
+_RESPONSE_CACHE = {}
+
+# Matches an unescaped audioUrl/audio_url value pointing at an audio file in a
+# raw JSON body, which is much cheaper than walking the parsed tree
+AUDIO_URL_RE = re.compile(
+    rb'"(?:audioUrl|audio_url)"\s*:\s*"(https?://[^"\\]*?(?:\.mp3|\.wav|/audio/)[^"\\]*)"'
+)
+
+# Candidate locations of the status field, in order of preference
+_STATUS_PATHS = (('data', 'status'), ('status',))
+
+# Keys that may hold the audio URL and substrings that mark a URL as audio
+_AUDIO_KEYS = ('audioUrl', 'audio_url', 'url', 'mp3Url', 'streamUrl')
+_AUDIO_MARKERS = ('.mp3', '.wav', '/audio/')
+
+# Read size for streamed downloads; large reads keep per-chunk Python overhead low
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+
+# Minimum seconds between progress updates while downloading
+PROGRESS_INTERVAL = 0.1
+
+# Files at least this large are fetched as concurrent byte ranges when the
+# server supports it
+RANGE_DOWNLOAD_MIN_SIZE = 2 << 20
+RANGE_DOWNLOAD_PARTS = 4
+
+def sync_and_release(fd):
+    """
+    Flush a finished download to disk and drop it from the page cache.
+    
+    Args:
+        fd: File descriptor of the downloaded file
+    """
+    if hasattr(os, 'fdatasync'):
+        os.fdatasync(fd)
+    else:
+        os.fsync(fd)
+    # The audio won't be read back soon, so don't let it evict hotter pages
+    if hasattr(os, 'posix_fadvise'):
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+
+def download_ranges(url, output_path, file_size, parts=RANGE_DOWNLOAD_PARTS):
+    """
+    Download a file as several byte ranges fetched concurrently.
+    
+    Args:
+        url: URL to download
+        output_path: Where to save the file
+        file_size: Total size of the file in bytes
+        parts: Number of ranges to fetch in parallel
+        
+    Returns:
+        bool: Whether download was successful
+    """
+    part_size = -(-file_size // parts)
+    ranges = [(start, min(start + part_size, file_size) - 1) for start in range(0, file_size, part_size)]
+    
+    def fetch(byte_range):
+        start, end = byte_range
+        headers = {"Range": f"bytes={start}-{end}", "Accept-Encoding": "identity"}
+        with SESSION.get(url, headers=headers, stream=True, timeout=60) as response:
+            if response.status_code != 206:
+                raise IOError(f"Range request returned status {response.status_code}")
+            offset = start
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                os.pwrite(fd, chunk, offset)
+                offset += len(chunk)
+        if offset != end + 1:
+            raise IOError(f"Range {start}-{end} ended early at byte {offset}")
+    
+    print(f"Downloading in {len(ranges)} parallel ranges...")
+    fd = os.open(output_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        # Reserve the full size up front so each range can write at its offset
+        if hasattr(os, 'posix_fallocate'):
+            os.posix_fallocate(fd, 0, file_size)
+        else:
+            os.ftruncate(fd, file_size)
+        
+        with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+            list(executor.map(fetch, ranges))
+        sync_and_release(fd)
+    except Exception as e:
+        print(f"Parallel download failed: {e}")
+        return False
+    finally:
+        os.close(fd)
+    
+    return True
+
 def download_file(url, output_path, max_retries=5):
     """
     Download a file from a URL with retries.
     
+    Data is written to output_path + '.part' and only renamed into place
+    once complete, so an interrupted download never leaves a partial file
+    at output_path.
+    
     Args:
         url: URL to download
         output_path: Where to save the file
@@ -32,13 +183,31 @@ def download_file(url, output_path, max_retries=5):
     Returns:
         bool: Whether download was successful
     """
+    tmp_path = output_path + '.part'
+    
+    # Split large files into concurrent range requests when the server allows
+    # it, falling back to a single stream otherwise
+    if hasattr(os, 'pwrite'):
+        try:
+            head = SESSION.head(url, headers={"Accept-Encoding": "identity"}, allow_redirects=True, timeout=30)
+            file_size = int(head.headers.get('content-length', 0))
+            if (head.status_code == 200 and head.headers.get('accept-ranges') == 'bytes'
+                    and file_size >= RANGE_DOWNLOAD_MIN_SIZE):
+                print(f"File size: {file_size / 1024 / 1024:.2f} MB")
+                if download_ranges(url, tmp_path, file_size):
+                    os.replace(tmp_path, output_path)
+                    print(f"File saved to {output_path}")
+                    return True
+        except Exception as e:
+            print(f"Could not check range support: {e}")
+    
     retry_count = 0
     while retry_count < max_retries:
         try:
             print(f"Download attempt {retry_count + 1}/{max_retries} from {url}")
             
             # Try with streaming (better for large files)
-            with requests.get(url, stream=True) as response:
+            with SESSION.get(url, stream=True, timeout=60) as response:
                 response.raise_for_status()
                 
                 # Get file size if available
@@ -46,19 +215,50 @@ def download_file(url, output_path, max_retries=5):
                 if file_size:
                     print(f"File size: {file_size / 1024 / 1024:.2f} MB")
                 
-                # Download with progress tracking
-                with open(output_path, 'wb') as f:
+                # Read into two reusable buffers instead of allocating a new
+                # bytes object per chunk; while one buffer is being written
+                # to disk by a background thread the next is filled from the
+                # network, so disk writes never stall the download
+                response.raw.decode_content = True
+                views = [memoryview(bytearray(DOWNLOAD_CHUNK_SIZE)) for _ in range(2)]
+                
+                # Download with progress tracking, rate-limited to ~10 updates a
+                # second and skipped entirely when stdout isn't a terminal
+                show_progress = bool(file_size) and sys.stdout.isatty()
+                with open(tmp_path, 'wb') as f, ThreadPoolExecutor(max_workers=1) as writer:
                     downloaded = 0
-                    for chunk in response.iter_content(chunk_size=8192):
-                        if chunk:
-                            f.write(chunk)
-                            downloaded += len(chunk)
-                            if file_size:
+                    last_report = 0.0
+                    pending = None
+                    current = 0
+                    while True:
+                        view = views[current]
+                        n = response.raw.readinto(view)
+                        if not n:
+                            break
+                        # The other buffer must be flushed before it is refilled
+                        if pending:
+                            pending.result()
+                        pending = writer.submit(f.write, view[:n])
+                        current ^= 1
+                        downloaded += n
+                        if show_progress:
+                            now = time.monotonic()
+                            if now - last_report >= PROGRESS_INTERVAL or downloaded >= file_size:
+                                last_report = now
                                 progress = (downloaded / file_size) * 100
-                                print(f"\rProgress: {progress:.1f}%", end='')
+                                print(f"\rProgress: {progress:.1f}%", end='', flush=True)
+                    if pending:
+                        pending.result()
+                    f.flush()
+                    sync_and_release(f.fileno())
                 print("\nDownload complete!")
                 
-                if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+                # Content-Length counts encoded bytes, so it can only be
+                # compared when the body wasn't compressed in transit
+                if file_size and not response.headers.get('content-encoding') and downloaded != file_size:
+                    print(f"Download truncated ({downloaded} of {file_size} bytes). Retrying...")
+                elif downloaded > 0:
+                    os.replace(tmp_path, output_path)
                     print(f"File saved to {output_path}")
                     return True
                 else:
@@ -73,50 +273,131 @@ def download_file(url, output_path, max_retries=5):
         time.sleep(wait_time)
         retry_count += 1
     
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
     return False
 
+def parse_task_response(task_id, response):
+    """
+    Parse a status response, reusing the previous result if the body is unchanged.
+    
+    Args:
+        task_id: The task ID the response belongs to
+        response: Successful response from a status endpoint
+        
+    Returns:
+        dict: Parsed task details
+    """
+    digest = hashlib.blake2b(response.content, digest_size=16).digest()
+    cached = _RESPONSE_CACHE.get(task_id)
+    if cached and cached[1] == digest:
+        task_details = cached[2]
+    else:
+        task_details = parse_json(response.content)
+    _RESPONSE_CACHE[task_id] = (response.headers.get('ETag'), digest, task_details, response.content)
+    return task_details
+
 def get_task_details(task_id):
     """
     Retrieve task details from the API.
     
+    The endpoint that answers first is remembered per task and queried
+    alone on later calls; all endpoints are probed again only if it fails.
+    
     Args:
         task_id: The task ID to check
         
     Returns:
         dict: Task details if successful, None otherwise
     """
-    headers = {
-        "Content-Type": "application/json",
-        "Accept": "application/json",
-        "Authorization": f"Bearer {SUNO_API_KEY}"
-    }
-    
-    # Try different endpoint formats
-    endpoints = [
-        f"{SUNO_API_BASE_URL}/generate/status?taskId={task_id}",
-        f"{SUNO_API_BASE_URL}/generate/result?taskId={task_id}",
-        f"{SUNO_API_BASE_URL}/task/{task_id}",
-        f"{SUNO_API_BASE_URL}/generate/{task_id}",
-        f"{SUNO_API_BASE_URL}/generate/audio?taskId={task_id}"
-    ]
-    
-    for endpoint in endpoints:
-        print(f"Trying endpoint: {endpoint}")
+    endpoint = _ENDPOINT_CACHE.get(task_id)
+    if endpoint:
+        cached = _RESPONSE_CACHE.get(task_id)
+        request_headers = HEADERS
+        if cached and cached[0]:
+            request_headers = {**HEADERS, "If-None-Match": cached[0]}
         try:
-            response = requests.get(endpoint, headers=headers)
+            response = SESSION.get(endpoint, headers=request_headers, timeout=30)
+            if response.status_code == 304 and cached:
+                print("Task details unchanged since last check")
+                return cached[2]
             if response.status_code == 200:
-                print(f"Success with endpoint: {endpoint}")
-                return response.json()
-            else:
-                print(f"Failed with status {response.status_code}: {endpoint}")
+                return parse_task_response(task_id, response)
+            print(f"Failed with status {response.status_code}: {endpoint}")
         except Exception as e:
             print(f"Error with endpoint {endpoint}: {e}")
+        del _ENDPOINT_CACHE[task_id]
+    
+    # Try different endpoint formats concurrently
+    endpoints = [template.format(task_id=task_id) for template in STATUS_ENDPOINTS]
+    
+    # Fire all probes at once and take the first 200, so a run of failing
+    # endpoints costs one round trip instead of one per endpoint
+    futures = {}
+    try:
+        for endpoint in endpoints:
+            print(f"Trying endpoint: {endpoint}")
+            futures[PROBE_EXECUTOR.submit(PROBE_SESSION.get, endpoint, headers=HEADERS, timeout=30)] = endpoint
+        
+        for future in as_completed(futures):
+            endpoint = futures[future]
+            try:
+                response = future.result()
+                if response.status_code == 200:
+                    print(f"Success with endpoint: {endpoint}")
+                    _ENDPOINT_CACHE[task_id] = endpoint
+                    return parse_task_response(task_id, response)
+                else:
+                    print(f"Failed with status {response.status_code}: {endpoint}")
+            except Exception as e:
+                print(f"Error with endpoint {endpoint}: {e}")
+    finally:
+        # Drop probes that haven't started; in-flight ones run to completion
+        # (at most their timeout) with their results ignored
+        for future in futures:
+            future.cancel()
+    
+    return None
+
+def get_status(task_id, task_details):
+    """
+    Extract the status field from task details.
+    
+    Args:
+        task_id: The task ID the details belong to
+        task_details: Parsed API response
+        
+    Returns:
+        str: Task status if found, None otherwise
+    """
+    def lookup(path):
+        obj = task_details
+        for key in path:
+            if not isinstance(obj, dict):
+                return None
+            obj = obj.get(key)
+        return obj
+    
+    path = _STATUS_PATH_CACHE.get(task_id)
+    if path:
+        status = lookup(path)
+        if status:
+            return status
+    
+    for path in _STATUS_PATHS:
+        status = lookup(path)
+        if status:
+            _STATUS_PATH_CACHE[task_id] = path
+            return status
     
     return None
 
 def find_audio_url(obj):
     """
-    Recursively search for audio URL in a nested JSON object.
+    Search for audio URL in a nested JSON object.
+    
+    Walks the tree with an explicit stack in document order, so deeply
+    nested responses don't cost a Python call frame per node.
     
     Args:
         obj: JSON object to search
@@ -124,38 +405,75 @@ def find_audio_url(obj):
     Returns:
         str: Audio URL if found, None otherwise
     """
-    if isinstance(obj, dict):
-        # Direct field matches
-        for key in ['audioUrl', 'audio_url', 'url', 'mp3Url', 'streamUrl']:
-            if key in obj and isinstance(obj[key], str) and (
-                    obj[key].startswith('http') and 
-                    ('.mp3' in obj[key] or '.wav' in obj[key] or '/audio/' in obj[key])
-                ):
-                return obj[key]
-        
-        # Search recursively in all values
-        for k, v in obj.items():
-            result = find_audio_url(v)
-            if result:
-                return result
-    
-    elif isinstance(obj, list):
-        for item in obj:
-            result = find_audio_url(item)
-            if result:
-                return result
+    # Local aliases for the exact type checks (see main.walk_find)
+    dict_type, list_type, str_type = dict, list, str
+    stack = [obj]
+    pop, extend = stack.pop, stack.extend
+    while stack:
+        node = pop()
+        node_type = type(node)
+        if node_type is dict_type:
+            # Direct field matches
+            for key in _AUDIO_KEYS:
+                value = node.get(key)
+                if (type(value) is str_type and value.startswith('http')
+                        and any(marker in value for marker in _AUDIO_MARKERS)):
+                    return value
+            
+            # Then search the nested values
+            extend(reversed(node.values()))
+        
+        elif node_type is list_type:
+            extend(reversed(node))
     
     return None
 
-def download_song(task_id, output_file, check_interval=10, max_checks=30):
+def find_task_audio_url(task_id, task_details):
+    """
+    Find the audio URL for a task, scanning the raw response body first.
+    
+    Args:
+        task_id: The task ID the details belong to
+        task_details: Parsed API response
+        
+    Returns:
+        str: Audio URL if found, None otherwise
+    """
+    cached = _RESPONSE_CACHE.get(task_id)
+    if cached:
+        match = AUDIO_URL_RE.search(cached[3])
+        if match:
+            return match.group(1).decode()
+    return find_audio_url(task_details)
+
+def warm_connection(url):
+    """
+    Open a pooled connection to the host serving url ahead of the download.
+    
+    Args:
+        url: URL whose host should be warmed up
+    """
+    try:
+        SESSION.head(url, timeout=10)
+    except Exception:
+        pass  # Only an optimisation; the real download reports errors
+
+def download_song(task_id, output_file, check_interval=15, max_checks=30, min_interval=2, debug=False,
+                  overwrite=False):
     """
     Check for song completion and download when ready.
     
+    Polling starts at min_interval and backs off by 1.5x per check up to
+    check_interval, resetting whenever the task status changes.
+    
     Args:
         task_id: The task ID to check
         output_file: Path to save the audio file
-        check_interval: Seconds between status checks
+        check_interval: Maximum seconds between status checks
         max_checks: Maximum number of status checks
+        min_interval: Initial seconds between status checks
+        debug: Whether to print full API responses
+        overwrite: Replace an existing output file without asking
         
     Returns:
         bool: Whether download was successful
@@ -163,14 +481,21 @@ def download_song(task_id, output_file, check_interval=10, max_checks=30):
     print(f"Monitoring task ID: {task_id}")
     print(f"Will save to: {output_file}")
     
-    # If output file already exists, ask for confirmation to overwrite
-    if os.path.exists(output_file):
+    # If output file already exists, ask for confirmation to overwrite, but
+    # never block waiting on input when there is no terminal to answer
+    if os.path.exists(output_file) and not overwrite:
         print(f"Warning: {output_file} already exists.")
+        if not sys.stdin.isatty():
+            print("Aborted. Use --force to overwrite.")
+            return False
         response = input("Overwrite? (y/n): ")
         if response.lower() != 'y':
             print("Aborted.")
             return False
     
+    warmed = False
+    last_status = None
+    delay = min_interval
     checks = 0
     while checks < max_checks:
         print(f"\nCheck {checks + 1}/{max_checks}...")
@@ -179,27 +504,28 @@ def download_song(task_id, output_file, check_interval=10, max_checks=30):
         if not task_details:
             print("Could not retrieve task details.")
             checks += 1
-            time.sleep(check_interval)
+            time.sleep(delay)
+            delay = min(check_interval, delay * 1.5)
             continue
         
         # Print the full response for debugging
-        print("API Response:")
-        print(json.dumps(task_details, indent=2))
+        if debug:
+            print("API Response:")
+            print(format_json(task_details))
         
         # Look for status
-        status = None
-        if isinstance(task_details, dict):
-            # Try common status paths
-            status = task_details.get('data', {}).get('status')
-            if not status:
-                status = task_details.get('status')
+        status = get_status(task_id, task_details)
         
         print(f"Task status: {status}")
         
+        if status != last_status:
+            delay = min_interval
+            last_status = status
+        
         # Check if complete
-        if status in ['complete', 'finished', 'success', 'done']:
+        if status in _DONE:
             # Find audio URL in the response
-            audio_url = find_audio_url(task_details)
+            audio_url = find_task_audio_url(task_id, task_details)
             
             if audio_url:
                 print(f"Audio URL found: {audio_url}")
@@ -211,30 +537,95 @@ def download_song(task_id, output_file, check_interval=10, max_checks=30):
             else:
                 print("No audio URL found in response. Will check again.")
         
-        elif status in ['failed', 'error']:
+        elif status in _FAIL:
             print("Task failed.")
             return False
         
         else:
-            print(f"Task still processing (status: {status}). Checking again in {check_interval} seconds...")
+            print(f"Task still processing (status: {status}). Checking again in {delay:.1f} seconds...")
+            
+            # Suno often publishes the audio URL before the task completes;
+            # warm the CDN connection while we wait
+            if not warmed:
+                audio_url = find_task_audio_url(task_id, task_details)
+                if audio_url:
+                    warmed = True
+                    threading.Thread(target=warm_connection, args=(audio_url,), daemon=True).start()
         
         checks += 1
-        time.sleep(check_interval)
+        time.sleep(delay)
+        delay = min(check_interval, delay * 1.5)
     
     print(f"Exceeded maximum checks ({max_checks}). Task may still be processing.")
     return False
 
+def download_songs(task_ids, output_dir, max_workers=4, overwrite=False, **kwargs):
+    """
+    Monitor and download several tasks concurrently.
+    
+    At most max_workers tasks are polled at once so a long list of task IDs
+    doesn't flood the API with requests and trigger rate limiting.
+    
+    Args:
+        task_ids: Task IDs to download
+        output_dir: Directory to save the audio files in, named <task_id>.mp3
+        max_workers: Maximum number of tasks monitored at the same time
+        overwrite: Replace existing output files instead of skipping them
+        **kwargs: Extra arguments passed through to download_song
+        
+    Returns:
+        dict: Mapping of task ID to whether its download was successful
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    
+    results = {}
+    pending = {}
+    for task_id in task_ids:
+        output_file = os.path.join(output_dir, f"{task_id}.mp3")
+        # Worker threads can't prompt, so existing files are skipped up front
+        if os.path.exists(output_file) and not overwrite:
+            print(f"Skipping {task_id}: {output_file} already exists. Use --force to overwrite.")
+            results[task_id] = False
+        else:
+            pending[task_id] = output_file
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(download_song, task_id, output_file, overwrite=True, **kwargs): task_id
+            for task_id, output_file in pending.items()
+        }
+        for future in as_completed(futures):
+            task_id = futures[future]
+            try:
+                results[task_id] = future.result()
+            except Exception as e:
+                print(f"Error downloading {task_id}: {e}")
+                results[task_id] = False
+    
+    succeeded = sum(results.values())
+    print(f"\nDownloaded {succeeded}/{len(task_ids)} songs to {output_dir}")
+    return results
+
 def main():
     """Main function to download song from command line."""
     parser = argparse.ArgumentParser(description='Download song from Suno API')
-    parser.add_argument('--task-id', type=str, help='Task ID to download')
+    parser.add_argument('--task-id', type=str, nargs='+', help='Task ID(s) to download')
     parser.add_argument('--output', type=str, default='output.mp3', help='Output file path')
-    parser.add_argument('--interval', type=int, default=10, help='Check interval in seconds')
+    parser.add_argument('--output-dir', type=str, default='.', help='Output directory when downloading several task IDs')
+    parser.add_argument('--workers', type=int, default=4, help='Maximum number of task IDs downloaded at once')
+    parser.add_argument('--interval', type=int, default=15, help='Maximum seconds between status checks')
     parser.add_argument('--max-checks', type=int, default=30, help='Maximum number of status checks')
+    parser.add_argument('--debug', action='store_true', help='Print full API responses')
+    parser.add_argument('--force', action='store_true', help='Overwrite the output file if it exists')
     
     args = parser.parse_args()
     
-    task_id = args.task_id
+    if args.task_id and len(args.task_id) > 1:
+        download_songs(args.task_id, args.output_dir, args.workers, overwrite=args.force,
+                       check_interval=args.interval, max_checks=args.max_checks, debug=args.debug)
+        return
+    
+    task_id = args.task_id[0] if args.task_id else None
     
     # If no task ID provided, try to read from file
     if not task_id:
@@ -246,7 +637,8 @@ def main():
             print("No task ID provided and no last_task_id.txt file found.")
             sys.exit(1)
     
-    download_song(task_id, args.output, args.interval, args.max_checks)
+    download_song(task_id, args.output, args.interval, args.max_checks, debug=args.debug,
+                  overwrite=args.force)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,26 @@
+"""
+HTTP helpers shared by the VerseVisions scripts.
+"""
+import requests
+from requests.adapters import HTTPAdapter
+
+def without_retries(session):
+    """
+    Return a session that sends over session's connection pools but never retries.
+
+    For optional requests (connection warm-ups, racing endpoint probes) that
+    should give up at once instead of sitting in the retry backoff, while
+    still opening or reusing the same kept-alive connections as session.
+
+    Args:
+        session: requests.Session whose adapters carry the connection pools
+
+    Returns:
+        requests.Session: Session sharing those pools, with retries disabled
+    """
+    quick = requests.Session()
+    for prefix, adapter in session.adapters.items():
+        single = HTTPAdapter(max_retries=0)
+        single.poolmanager = adapter.poolmanager
+        quick.mount(prefix, single)
+    return quick
@@ -0,0 +1,30 @@
+"""
+JSON helpers shared by the VerseVisions scripts.
+
+orjson is used when it is installed; otherwise the standard library json
+module is used, so orjson stays an optional dependency.
+"""
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def parse_json(data):
+    """Parse a JSON response body (bytes or str)."""
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def encode_json(obj):
+    """Serialize an object to compact JSON bytes for a request body."""
+    if orjson:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':')).encode()
+
+def format_json(obj):
+    """Pretty-print a JSON object for display."""
+    if orjson:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+    return json.dumps(obj, indent=2)
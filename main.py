@@ -3,25 +3,70 @@
 Lyrics and Music Generator using Anthropic for lyrics and Suno API for music generation.
 """
 import os
+import re
+import sys
 import json
 import time
+import logging
+import functools
+import types
+import random
+import base64
+import hashlib
+import shutil
 import argparse
+import threading
+import http.server
 import requests
-from dotenv import load_dotenv
-from anthropic import Anthropic
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from json_utils import parse_json, encode_json, format_json
+from http_utils import without_retries
 
-# Load environment variables
-load_dotenv()
+# Debug output goes through this logger so it costs nothing unless --debug is set
+logger = logging.getLogger(__name__)
 
-# API keys
-ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
-SUNO_API_KEY = os.getenv("SUNO_API_KEY")
-VIDEO_API_KEY = os.getenv("VIDEO_API_KEY")
-DALLE_API_KEY = os.getenv("DALLE_API_KEY")
+@functools.lru_cache(maxsize=None)
+def api_config():
+    """
+    Read the API keys from the environment, once.
+    
+    main() loads .env before the first call; importing this module does not
+    touch the environment or the filesystem.
+    
+    Returns:
+        SimpleNamespace: API keys, whether each optional key is set, and the
+            Suno request headers
+    """
+    suno_key = os.getenv("SUNO_API_KEY")
+    video_key = os.getenv("VIDEO_API_KEY")
+    dalle_key = os.getenv("DALLE_API_KEY")
+    return types.SimpleNamespace(
+        anthropic_key=os.getenv("ANTHROPIC_API_KEY"),
+        suno_key=suno_key,
+        suno_key_set=bool(suno_key and suno_key.strip()),
+        video_key=video_key,
+        video_key_set=bool(video_key and video_key.strip()),
+        dalle_key=dalle_key,
+        dalle_key_set=bool(dalle_key and dalle_key.strip()),
+        # Passed per request rather than set on a session so the API key is
+        # never sent to the audio CDN
+        suno_headers={
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+            "Authorization": f"Bearer {suno_key}"
+        }
+    )
 
 # API endpoints
 SUNO_API_BASE_URL = "https://apibox.erweima.ai/api/v1"
 
+# Callback URL sent to Suno when no --callback-url is given; the API requires
+# one, but nothing listens there and completion is detected by polling
+SUNO_CALLBACK_PLACEHOLDER = "https://example.com/callback"
+
 # Suno API Status Codes
 SUNO_STATUS = {
     "PENDING": "Pending execution",
@@ -34,14 +79,384 @@ SUNO_STATUS = {
     "SENSITIVE_WORD_ERROR": "Sensitive word error"
 }
 
+# Status endpoint formats, queried concurrently. The first is the documented
+# endpoint; the rest are alternates in case it fails.
+SUNO_STATUS_ENDPOINTS = (
+    SUNO_API_BASE_URL + "/generate/record-info?taskId={task_id}",
+    SUNO_API_BASE_URL + "/generate/status?taskId={task_id}",
+    SUNO_API_BASE_URL + "/generate/result?taskId={task_id}",
+    SUNO_API_BASE_URL + "/task/{task_id}",
+    SUNO_API_BASE_URL + "/generate/{task_id}"
+)
+
+# Suno statuses grouped by what monitor_and_download does with them
+SUNO_SUCCESS_STATUSES = frozenset({'SUCCESS', 'FIRST_SUCCESS'})
+SUNO_FAILED_STATUSES = frozenset({
+    'CREATE_TASK_FAILED', 'GENERATE_AUDIO_FAILED', 'CALLBACK_EXCEPTION', 'SENSITIVE_WORD_ERROR'
+})
+SUNO_WAITING_STATUSES = frozenset({'PENDING', 'TEXT_SUCCESS'})
+
+class LazyJSON:
+    """
+    Wrap a JSON object so it is only pretty-printed when first converted to str.
+    
+    Passed as a logging argument, the object is never serialized if the log
+    level is disabled, and only once however many times it is logged.
+    """
+    __slots__ = ('obj', '_text')
+    
+    def __init__(self, obj):
+        self.obj = obj
+        self._text = None
+    
+    def __str__(self):
+        if self._text is None:
+            self._text = format_json(self.obj)
+        return self._text
+
+def configure_logging(debug=False):
+    """Send log messages to stderr, including debug output if requested."""
+    logging.basicConfig(format="%(message)s")
+    logger.setLevel(logging.DEBUG if debug else logging.INFO)
+
+# Keys that may hold the generated audio URL, in order of preference, and
+# the pattern marking a URL as audio
+AUDIO_URL_KEYS = ('audioUrl', 'audio_url', 'mp3Url', 'streamUrl', 'url')
+AUDIO_URL_MARKER_RE = re.compile(r'\.mp3|\.wav|/audio/')
+
+# Keys holding the task status
+STATUS_KEYS = ('status',)
+
+# Matches an audio URL under one of AUDIO_URL_KEYS in a raw JSON body. URLs
+# containing escapes don't match and are left to the tree walk.
+AUDIO_URL_RE = re.compile(
+    rb'"(?:audioUrl|audio_url|url|mp3Url|streamUrl)"\s*:\s*'
+    rb'"(https?://[^"\\]*?(?:\.mp3|\.wav|/audio/)[^"\\]*)"'
+)
+
+def walk_find(obj, keys, accept=bool):
+    """
+    Search a nested JSON object for the first acceptable value under any of the given keys.
+    
+    Walks the tree iteratively in document order with an explicit stack, so
+    deeply nested responses don't cost a Python call frame per node. Each
+    dict costs one lookup per key rather than a visit to every item.
+    
+    Args:
+        obj: JSON object to search
+        keys: Keys to look for, in order of preference within a dict
+        accept: Callable returning truthy for a value that counts as a match
+        
+    Returns:
+        The first matching value, or None if nothing matches
+    """
+    # Parsed JSON only contains plain dicts and lists, so exact type checks
+    # are safe and cheaper than isinstance on this per-node path
+    stack = deque([obj])
+    pop, extend = stack.pop, stack.extend
+    while stack:
+        node = pop()
+        node_type = type(node)
+        if node_type is dict:
+            for key in keys:
+                if key in node and accept(node[key]):
+                    return node[key]
+            extend(reversed(node.values()))
+        elif node_type is list:
+            extend(reversed(node))
+    return None
+
+def is_audio_url(value):
+    """Return True if a value looks like a downloadable audio URL."""
+    return (type(value) is str and value.startswith('http')
+            and AUDIO_URL_MARKER_RE.search(value) is not None)
+
+# Read size for streamed downloads; large reads keep per-chunk overhead low
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+
+# DALL-E image generation endpoint, how many images to request at once and
+# how often to retry a rate-limited request
+DALLE_API_URL = "https://api.openai.com/v1/images/generations"
+DALLE_CONCURRENCY = 5
+
+# Number of images generated for each song
+DALLE_NUM_IMAGES = 5
+DALLE_RATE_LIMIT_RETRIES = 3
+
+# Widest frame, in pixels, in generated videos; larger images are scaled down
+VIDEO_MAX_WIDTH = 1280
+
+# Maps a hash of each song request to where its audio was downloaded, with
+# the file's size and SHA-256 so an overwritten file isn't mistaken for it
+GENERATION_MANIFEST = os.path.join("artifacts", "generation_manifest.json")
+
+# Suffix of the file recording which URL a downloaded song came from
+DOWNLOAD_SOURCE_SUFFIX = ".source.json"
+
+# Default file name for the downloaded song
+DEFAULT_OUTPUT = "output.mp3"
+
+# Minimum seconds between download progress updates
+PROGRESS_INTERVAL = 0.25
+
+# Longest wait, in seconds, between retries of a failed request
+RETRY_BACKOFF_CAP = 30
+
+# Attempts at downloading the audio when the connection drops mid-body, and
+# the errors that mean it did
+DOWNLOAD_ATTEMPTS = 3
+RETRYABLE_DOWNLOAD_ERRORS = (
+    requests.exceptions.ChunkedEncodingError,
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout
+)
+
+def file_sha256(path):
+    """Return the hex SHA-256 of a file, read in DOWNLOAD_CHUNK_SIZE blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+class JitteredRetry(Retry):
+    """
+    urllib3 Retry that randomizes its backoff.
+    
+    Each wait is drawn between backoff_factor and three times the usual
+    exponential backoff, capped at RETRY_BACKOFF_CAP, so clients that failed
+    together don't all retry at the same moment.
+    """
+    
+    def get_backoff_time(self):
+        backoff = super().get_backoff_time()
+        if backoff <= 0:
+            return 0
+        return min(RETRY_BACKOFF_CAP, random.uniform(self.backoff_factor, backoff * 3))
+
+# Keys under which a Suno callback body carries its task ID
+CALLBACK_TASK_ID_KEYS = ('task_id', 'taskId')
+
+class CallbackHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Receives Suno's task callbacks and wakes the matching status monitor.
+    
+    Only the task ID is read from the callback body; monitor_and_download
+    re-checks that task through the status endpoint. If no task ID can be
+    found, every monitor is woken instead.
+    """
+    
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length)
+        logger.debug("Suno callback: %s", body)
+        self.send_response(200)
+        self.end_headers()
+        try:
+            task_id = walk_find(parse_json(body), CALLBACK_TASK_ID_KEYS, accept=lambda v: isinstance(v, str) and v)
+        except ValueError:
+            task_id = None
+        self.server.notify_status(task_id)
+    
+    def log_message(self, format, *args):
+        logger.debug("Callback server: " + format, *args)
+
+# Claude model used for lyric generation by default
+LYRICS_MODEL = "claude-sonnet-4-5-20250929"
+
+# Slower, more expensive model used with --high-quality-lyrics
+HIGH_QUALITY_LYRICS_MODEL = "claude-opus-4-1-20250805"
+
+# Largest max_tokens a single non-streaming lyrics request may ask for. The
+# Anthropic SDK refuses non-streaming requests expected to run over 10
+# minutes (about 21,333 output tokens) and caps some models lower still, so
+# these are below the models' own output limits. Any other model passed with
+# --lyrics-model gets a conservative default.
+LYRICS_MODEL_TOKEN_LIMITS = {
+    LYRICS_MODEL: 21333,
+    HIGH_QUALITY_LYRICS_MODEL: 8192,
+}
+DEFAULT_TOKEN_LIMIT = 4096
+
+# Output token budget for lyrics; raised only for songs with more than
+# LYRICS_BASE_VERSES verses
+LYRICS_MAX_TOKENS = 1000
+LYRICS_BASE_VERSES = 4
+LYRICS_TOKENS_PER_EXTRA_VERSE = 200
+
+# Extra output tokens allowed per image prompt written with the lyrics
+IMAGE_PROMPT_TOKENS = 60
+
+# Where generated lyrics are cached between runs
+LYRICS_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "verseversions")
+
+# System prompt for lyric generation. Kept as a constant so it is
+# byte-identical across calls, which Anthropic's prompt cache requires.
+SYSTEM_PROMPT = """You are a professional songwriter with expertise in many musical styles.
+Create original, creative, and emotionally resonant lyrics that feel authentic to the requested style.
+Structure the lyrics properly and ensure they have a cohesive theme."""
+
+# Formatting rules that are the same for every song. Sent in the system
+# prompt so they are part of the cached prefix.
+LYRICS_FORMAT_INSTRUCTIONS = (
+    'Reply with a JSON object {"title": ..., "content": ...}, '
+    "separating verses and chorus in content with blank lines."
+)
+
+# Start of the assistant reply, prefilled so the model continues the JSON
+# object, and the stop sequence that ends the reply after it
+LYRICS_PREFILL = '{"title": "'
+LYRICS_STOP_SEQUENCES = ["\n\n\n"]
+
+# Splits a lyrics reply that isn't valid JSON (usually one cut off at
+# max_tokens) into the rest of its title string and its content string
+LYRICS_SALVAGE_RE = re.compile(
+    r'((?:[^"\\]|\\.)*)"\s*,\s*"content"\s*:\s*"((?:[^"\\]|\\.)*)', re.DOTALL
+)
+
+def unescape_json_string(text):
+    """
+    Decode the body of a JSON string that may have been cut off.
+    
+    Args:
+        text: Characters between the quotes, possibly ending mid-escape
+        
+    Returns:
+        str: The decoded text
+    """
+    try:
+        return json.loads(f'"{text}"')
+    except ValueError:
+        pass
+    # Drop a trailing escape that was cut off before it completed
+    text = re.sub(r'(?<!\\)((?:\\\\)*)\\(u[0-9a-fA-F]{0,3})?$', r'\1', text)
+    try:
+        return json.loads(f'"{text}"')
+    except ValueError:
+        return text.replace('\\n', '\n').replace('\\"', '"')
+
+class ResponseCache:
+    """Cache of JSON-serializable API results, kept in memory and on disk."""
+    
+    def __init__(self, cache_dir=LYRICS_CACHE_DIR, max_entries=128, ttl=86400):
+        """
+        Initialize the cache.
+        
+        Args:
+            cache_dir: Directory where entries are persisted as JSON files
+            max_entries: Maximum number of entries kept in memory
+            ttl: Seconds before an entry expires (None to never expire)
+        """
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._memory = OrderedDict()
+        # Set once the cache directory is known to exist
+        self._dir_ready = False
+    
+    @staticmethod
+    def make_key(*parts):
+        """
+        Build a cache key by hashing the given arguments.
+        
+        Args:
+            *parts: JSON-serializable values identifying the request
+            
+        Returns:
+            str: Hex SHA-256 digest of the arguments
+        """
+        data = json.dumps(parts, sort_keys=True)
+        return hashlib.sha256(data.encode()).hexdigest()
+    
+    def get(self, key):
+        """
+        Look up a cached value.
+        
+        Args:
+            key: Cache key from make_key
+            
+        Returns:
+            The cached value, or None if missing or expired
+        """
+        entry = self._memory.get(key)
+        if entry is None:
+            entry = self._load(key)
+            if entry is None:
+                return None
+        
+        if self.ttl and time.time() - entry['created'] > self.ttl:
+            self._memory.pop(key, None)
+            return None
+        
+        self._remember(key, entry)
+        return entry['value']
+    
+    def set(self, key, value):
+        """
+        Store a value in memory and on disk.
+        
+        Args:
+            key: Cache key from make_key
+            value: JSON-serializable value to store
+        """
+        entry = {'created': time.time(), 'value': value}
+        self._remember(key, entry)
+        
+        try:
+            if not self._dir_ready:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                self._dir_ready = True
+            path = self._path(key)
+            with open(path + '.tmp', 'wb') as f:
+                f.write(encode_json(entry))
+            os.replace(path + '.tmp', path)
+        except OSError as e:
+            print(f"Warning: could not write cache entry: {e}")
+    
+    def _path(self, key):
+        """Return the file path for a cache key."""
+        return os.path.join(self.cache_dir, f"{key}.json")
+    
+    def _load(self, key):
+        """Read an entry from disk, returning None if absent or unreadable."""
+        try:
+            with open(self._path(key), 'rb') as f:
+                return parse_json(f.read())
+        except (OSError, ValueError):
+            return None
+    
+    def _remember(self, key, entry):
+        """Add an entry to the in-memory LRU, evicting the oldest if full."""
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+
 class LyricsGenerator:
     """Class to generate lyrics using Anthropic's Claude model."""
     
-    def __init__(self):
-        """Initialize the Anthropic client."""
-        self.client = Anthropic(api_key=ANTHROPIC_API_KEY)
+    def __init__(self, debug=False, cache=None, cache_enabled=True):
+        """
+        Initialize the Anthropic client.
+        
+        Args:
+            debug: Enable detailed logging
+            cache: ResponseCache for generated lyrics (defaults to a new one)
+            cache_enabled: Whether to read and write the lyrics cache
+        """
+        # Imported here so runs that never write lyrics (e.g. --check-task)
+        # don't pay for loading the Anthropic SDK
+        from anthropic import Anthropic
+        self.client = Anthropic(api_key=api_config().anthropic_key)
+        self.debug = debug
+        if debug:
+            configure_logging(debug=True)
+        self.cache = cache if cache is not None else ResponseCache()
+        self.cache_enabled = cache_enabled
     
-    def generate_lyrics(self, prompt, style=None, num_verses=2, has_chorus=True):
+    def generate_lyrics(self, prompt, style=None, num_verses=2, has_chorus=True, model=LYRICS_MODEL,
+                        num_image_prompts=0):
         """
         Generate lyrics using Anthropic's Claude model.
         
@@ -50,45 +465,284 @@ class LyricsGenerator:
             style: Music style (e.g., "rock", "pop", "rap")
             num_verses: Number of verses to generate
             has_chorus: Whether to include a chorus
+            model: Claude model to use
+            num_image_prompts: Number of image prompts to write along with the lyrics
             
         Returns:
-            dict: Generated lyrics with title and content
+            dict: Generated lyrics with title, content and image_prompts
+            
+        Raises:
+            ValueError: If no lyrics could be recovered from Claude's reply
         """
-        # Construct a detailed prompt for Claude
-        system_prompt = """You are a professional songwriter with expertise in many musical styles.
-        Create original, creative, and emotionally resonant lyrics that feel authentic to the requested style.
-        Structure the lyrics properly and ensure they have a cohesive theme."""
+        # Reuse lyrics from an identical earlier request
+        cache_key = self._cache_key(model, prompt, style, num_verses, has_chorus, num_image_prompts)
+        cached = self.cache.get(cache_key) if self.cache_enabled else None
+        if cached:
+            print("Using cached lyrics for this theme and style.")
+            return dict(cached)
         
-        style_instruction = f"Write in {style} style. " if style else ""
-        structure_instruction = f"Include {num_verses} verses"
-        structure_instruction += " and a chorus that repeats." if has_chorus else "."
+        user_prompt = (
+            f"{self._style_instructions(style, num_verses, has_chorus, num_image_prompts)}"
+            f"Write lyrics for a song about: {prompt}."
+        )
+        max_tokens = min(self._max_tokens(num_verses, num_image_prompts), self._token_limit(model))
         
-        user_prompt = f"{style_instruction}Write lyrics for a song about: {prompt}. {structure_instruction} \
-        Include a title at the top. Format the output so verses and chorus are clearly separated."
+        # The reply continues the prefilled JSON object; raw_decode ignores
+        # anything the model adds after the closing brace. A reply that
+        # doesn't parse was usually cut off at max_tokens, so it is retried
+        # once with a larger budget.
+        result = None
+        for attempt in range(2):
+            reply = self._create_message(model, max_tokens, user_prompt, LYRICS_PREFILL)
+            try:
+                parsed, _ = json.JSONDecoder().raw_decode((LYRICS_PREFILL + reply).strip())
+                result = self._make_result(parsed)
+                break
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                error = e
+            larger = min(max_tokens * 2, self._token_limit(model))
+            if attempt or larger <= max_tokens:
+                break
+            print(f"Warning: could not parse lyrics JSON ({error}); retrying with {larger} tokens")
+            max_tokens = larger
         
-        # Get response from Claude
-        response = self.client.messages.create(
-            model="claude-3-opus-20240229",
-            max_tokens=1000,
-            system=system_prompt,
-            messages=[
-                {"role": "user", "content": user_prompt}
-            ]
-        )
+        if result is None:
+            # Use what can be recovered from the reply, but don't cache it so
+            # the next run asks again
+            print(f"Warning: could not parse lyrics JSON ({error}); using the lyrics recovered from the reply")
+            return self._make_result(self._salvage_reply(reply, prompt))
+        
+        if self.cache_enabled:
+            self.cache.set(cache_key, result)
+        return result
+    
+    def generate_lyrics_batch(self, themes, style=None, num_verses=2, has_chorus=True, model=LYRICS_MODEL,
+                              num_image_prompts=0):
+        """
+        Generate lyrics for several themes with a single Claude request.
+        
+        Themes with cached lyrics are skipped; the rest are requested together
+        as a JSON array, so the shared prompt prefix is only sent once. Themes
+        are split across as many requests as needed to keep each reply within
+        LYRICS_MODEL_TOKEN_LIMITS. If a request fails or its reply can't be
+        parsed, its themes fall back to generate_lyrics one at a time.
+        
+        Args:
+            themes: List of themes, one song per theme
+            style: Music style (e.g., "rock", "pop", "rap")
+            num_verses: Number of verses per song
+            has_chorus: Whether to include a chorus
+            model: Claude model to use
+            num_image_prompts: Number of image prompts to write along with each song
+            
+        Returns:
+            list: Generated lyrics dicts with title, content and image_prompts,
+                in theme order
+        """
+        results = [None] * len(themes)
+        cache_keys = [
+            self._cache_key(model, theme, style, num_verses, has_chorus, num_image_prompts)
+            for theme in themes
+        ]
+        missing = []
+        for i, cache_key in enumerate(cache_keys):
+            cached = self.cache.get(cache_key) if self.cache_enabled else None
+            if cached:
+                print(f"Using cached lyrics for theme: {themes[i]}")
+                results[i] = dict(cached)
+            else:
+                missing.append(i)
         
-        # Extract lyrics and title
-        lyrics_text = response.content[0].text
+        from anthropic import APIError
         
-        # Parse out the title (assuming it's the first line)
-        lines = lyrics_text.strip().split('\n')
-        title = lines[0].replace("#", "").strip()
-        content = '\n'.join(lines[1:]).strip()
+        # Split the request so each reply fits in one request's token limit
+        per_song = min(self._max_tokens(num_verses, num_image_prompts), self._token_limit(model))
+        chunk_size = max(1, self._token_limit(model) // per_song)
+        instructions = self._style_instructions(style, num_verses, has_chorus, num_image_prompts)
+        for start in range(0, len(missing), chunk_size):
+            chunk = missing[start:start + chunk_size]
+            if len(chunk) < 2:
+                continue
+            try:
+                songs = self._generate_batch_chunk(
+                    [themes[i] for i in chunk], instructions, model, per_song * len(chunk)
+                )
+            except (APIError, ValueError, KeyError, TypeError, AttributeError) as e:
+                # API errors and unparsable replies both fall back to one
+                # request per theme below
+                print(f"Warning: batched lyrics request failed ({e}); generating songs one at a time")
+                continue
+            for i, song in zip(chunk, songs):
+                results[i] = song
+                if self.cache_enabled:
+                    self.cache.set(cache_keys[i], song)
         
+        # Anything still missing is generated on its own
+        for i in missing:
+            if results[i] is None:
+                results[i] = self.generate_lyrics(
+                    themes[i], style, num_verses, has_chorus, model, num_image_prompts
+                )
+        return results
+    
+    def _generate_batch_chunk(self, themes, instructions, model, max_tokens):
+        """
+        Request lyrics for several themes in one message.
+        
+        Args:
+            themes: Themes to write songs for
+            instructions: Style, structure and image prompt instructions
+            model: Claude model to use
+            max_tokens: Output token budget for the whole reply
+            
+        Returns:
+            list: Lyrics dicts in theme order
+            
+        Raises:
+            ValueError: If the reply isn't one lyrics object per theme
+        """
+        user_prompt = (
+            f"{instructions}"
+            "Return a JSON array of lyrics objects where element i is a song about themes[i]. "
+            f"themes = {json.dumps(themes)}"
+        )
+        prefill = "[" + LYRICS_PREFILL
+        reply = self._create_message(model, max_tokens, user_prompt, prefill)
+        parsed, _ = json.JSONDecoder().raw_decode((prefill + reply).strip())
+        if len(parsed) != len(themes):
+            raise ValueError(f"expected {len(themes)} songs, got {len(parsed)}")
+        return [self._make_result(song) for song in parsed]
+    
+    @staticmethod
+    def _cache_key(model, theme, style, num_verses, has_chorus, num_image_prompts=0):
+        """Build the lyrics cache key for a song request."""
+        # The fixed instructions are part of the key so editing them
+        # invalidates lyrics generated with the old wording
+        return ResponseCache.make_key(
+            model, SYSTEM_PROMPT, LYRICS_FORMAT_INSTRUCTIONS, theme, style, num_verses, has_chorus,
+            num_image_prompts
+        )
+    
+    @staticmethod
+    def _style_instructions(style, num_verses, has_chorus, num_image_prompts=0):
+        """Build the style, song structure and image prompt part of the user prompt."""
+        style_instruction = f"Write in {style} style. " if style else ""
+        structure_instruction = f"Include {num_verses} verses"
+        structure_instruction += " and a chorus that repeats. " if has_chorus else ". "
+        image_instruction = ""
+        if num_image_prompts:
+            image_instruction = (
+                f'Also include "image_prompts": an array of {num_image_prompts} short, '
+                "distinct visual scene descriptions that illustrate the song. "
+            )
+        return style_instruction + structure_instruction + image_instruction
+    
+    @staticmethod
+    def _max_tokens(num_verses, num_image_prompts=0):
+        """Return the output token budget for one song."""
+        # Only songs longer than the usual structure need a bigger budget
+        max_tokens = LYRICS_MAX_TOKENS + num_image_prompts * IMAGE_PROMPT_TOKENS
+        if num_verses > LYRICS_BASE_VERSES:
+            max_tokens += (num_verses - LYRICS_BASE_VERSES) * LYRICS_TOKENS_PER_EXTRA_VERSE
+        return max_tokens
+    
+    @staticmethod
+    def _token_limit(model):
+        """Return the largest max_tokens one lyrics request to a model may use."""
+        return LYRICS_MODEL_TOKEN_LIMITS.get(model, DEFAULT_TOKEN_LIMIT)
+    
+    @staticmethod
+    def _salvage_reply(reply, default_title):
+        """
+        Recover a title and lyrics from a reply that isn't valid JSON.
+        
+        The reply continues LYRICS_PREFILL, so it normally starts with the
+        rest of the title string followed by a (possibly cut off) content
+        string. Both are unescaped.
+        
+        Args:
+            reply: Text of the reply, without the prefill
+            default_title: Title to use if none can be recovered
+            
+        Returns:
+            dict: {"title", "content"} for _make_result
+            
+        Raises:
+            ValueError: If no lyrics can be recovered from the reply
+        """
+        match = LYRICS_SALVAGE_RE.match(reply)
+        if not match:
+            raise ValueError("Claude's reply contains no lyrics")
+        title, content = (unescape_json_string(group) for group in match.groups())
+        if not content.strip():
+            raise ValueError("Claude's reply contains no lyrics")
+        return {"title": title or default_title, "content": content}
+    
+    @staticmethod
+    def _make_result(song):
+        """Build a lyrics dict from a parsed {"title", "content", "image_prompts"} object."""
+        title = song["title"].strip()
+        content = song["content"].strip()
+        image_prompts = [p.strip() for p in song.get("image_prompts") or [] if isinstance(p, str) and p.strip()]
         return {
             "title": title,
             "content": content,
-            "full_text": lyrics_text
+            "full_text": f"{title}\n\n{content}",
+            "image_prompts": image_prompts
         }
+    
+    def _create_message(self, model, max_tokens, user_prompt, prefill):
+        """
+        Send a lyrics request to Claude.
+        
+        Args:
+            model: Claude model to use
+            max_tokens: Output token budget
+            user_prompt: Per-request instructions
+            prefill: Start of the assistant reply for the model to continue
+            
+        Returns:
+            str: The text of the reply, without the prefill
+        """
+        # Everything that is the same on every call lives in the system
+        # prompt, which ends in a single cache breakpoint so repeated calls
+        # reuse the processed prefix. The user turn only carries the
+        # per-request instructions.
+        response = self.client.messages.create(
+            model=model,
+            max_tokens=max_tokens,
+            system=[
+                {"type": "text", "text": SYSTEM_PROMPT},
+                {"type": "text", "text": LYRICS_FORMAT_INSTRUCTIONS, "cache_control": {"type": "ephemeral"}}
+            ],
+            messages=[
+                {"role": "user", "content": user_prompt},
+                {"role": "assistant", "content": prefill}
+            ],
+            stop_sequences=LYRICS_STOP_SEQUENCES
+        )
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            cache_read = getattr(response.usage, 'cache_read_input_tokens', None) or 0
+            cache_write = getattr(response.usage, 'cache_creation_input_tokens', None) or 0
+            logger.debug("Prompt cache: %d tokens read, %d tokens written", cache_read, cache_write)
+        
+        return response.content[0].text
+
+
+@functools.lru_cache(maxsize=None)
+def warn_missing_keys():
+    """Print a warning for each unset API key; only the first call prints."""
+    config = api_config()
+    if not config.suno_key_set:
+        print("ERROR: SUNO_API_KEY environment variable is not set or is empty.")
+        print("Please add your Suno API key to the .env file.")
+    if not config.video_key_set:
+        print("WARNING: VIDEO_API_KEY environment variable is not set or is empty.")
+        print("Video generation will be skipped. Add your Video API key to the .env file to enable video generation.")
+    if not config.dalle_key_set:
+        print("WARNING: DALLE_API_KEY environment variable is not set or is empty.")
+        print("Image generation will be skipped. Add your DALL-E API key to the .env file to enable image generation.")
 
 
 class MusicGenerator:
@@ -96,41 +750,208 @@ class MusicGenerator:
     
     def __init__(self, debug=False):
         """
-        Initialize with the Suno API key.
+        Initialize the HTTP session used for the Suno API.
         
         Args:
             debug: Enable detailed logging
         """
-        self.api_key = SUNO_API_KEY
         self.debug = debug
-        self.headers = {
-            "Content-Type": "application/json",
-            "Accept": "application/json",
-            "Authorization": f"Bearer {self.api_key}"
-        }
+        if debug:
+            configure_logging(debug=True)
         
-        # Verify API key is set
-        if not self.api_key or self.api_key.strip() == "":
-            print("ERROR: SUNO_API_KEY environment variable is not set or is empty.")
-            print("Please add your Suno API key to the .env file.")
-
-        # Video generation API setup
-        self.video_api_key = VIDEO_API_KEY
-        if not self.video_api_key or self.video_api_key.strip() == "":
-            print("WARNING: VIDEO_API_KEY environment variable is not set or is empty.")
-            print("Video generation will be skipped. Add your Video API key to the .env file to enable video generation.")
-            self.video_enabled = False
-        else:
-            self.video_enabled = True
-
-        # DALL-E API setup
-        self.dalle_api_key = DALLE_API_KEY
-        if not self.dalle_api_key or self.dalle_api_key.strip() == "":
-            print("WARNING: DALLE_API_KEY environment variable is not set or is empty.")
-            print("Image generation will be skipped. Add your DALL-E API key to the .env file to enable image generation.")
-            self.dalle_enabled = False
-        else:
-            self.dalle_enabled = True
+        # API keys and headers come from the shared config, so constructing
+        # more instances doesn't re-read or re-check them
+        config = api_config()
+        self.api_key = config.suno_key
+        self.headers = config.suno_headers
+        self.video_api_key = config.video_key
+        self.video_enabled = config.video_key_set
+        self.dalle_api_key = config.dalle_key
+        self.dalle_enabled = config.dalle_key_set
+        warn_missing_keys()
+        
+        # Keep-alive session for every HTTP call (Suno, DALL-E, video and
+        # file downloads) so requests to the same host reuse connections.
+        # Auth headers are passed per request rather than set on the session
+        # so no API key is sent to another service or to a CDN. Failed GETs
+        # are retried on the same pooled connections; POSTs are never retried
+        # so a song is not submitted twice.
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(
+            pool_connections=10,
+            pool_maxsize=20,
+            max_retries=JitteredRetry(
+                total=5,
+                backoff_factor=1,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=frozenset({'GET'}),
+                respect_retry_after_header=True,
+                raise_on_status=False
+            )
+        ))
+        
+        # Worker threads for the concurrent status probes, kept for the life
+        # of the generator rather than started on every poll. Sized for two
+        # rounds so a slow round can't starve the next one.
+        self.status_executor = ThreadPoolExecutor(max_workers=2 * len(SUNO_STATUS_ENDPOINTS))
+        
+        # Same pools without retries, for warm-ups and racing status probes
+        # that should fail fast instead of waiting out the retry backoff
+        self.quick_session = without_retries(self.session)
+        
+        # Status endpoint template that last answered, polled on its own
+        self.status_endpoint = None
+        
+        # Where Suno reports task progress, and one event per task ID that a
+        # local callback server sets to cut that task's status-check wait short
+        self.callback_url = SUNO_CALLBACK_PLACEHOLDER
+        self._status_events = {}
+        self._status_events_lock = threading.Lock()
+        
+        # Last status response per task with its ETag/Last-Modified, so polls
+        # can be conditional and a 304 reuses the already parsed details
+        self._status_cache = {}
+        
+        # Serializes manifest updates from concurrent songs in a batch
+        self._manifest_lock = threading.Lock()
+
+    @staticmethod
+    def job_key(title, lyrics, style, custom_mode, instrumental, model):
+        """Return a hash identifying a song generation request."""
+        parts = [title, lyrics, style, custom_mode, instrumental, model]
+        return hashlib.sha256(json.dumps(parts).encode()).hexdigest()
+
+    def find_generated(self, title, lyrics, style, custom_mode, instrumental, model):
+        """
+        Look up a song already generated from the same inputs.
+        
+        The recorded file is only reused if its size and SHA-256 still match
+        what was downloaded, since a later run with the same theme and output
+        name may have overwritten it with a different song.
+        
+        Returns:
+            str: Path to the downloaded audio, or None if there is none or the
+                file has since been removed or changed
+        """
+        key = self.job_key(title, lyrics, style, custom_mode, instrumental, model)
+        entry = self._load_manifest().get(key)
+        if not isinstance(entry, dict):
+            return None
+        path = entry.get('path')
+        try:
+            if not path or os.stat(path).st_size != entry.get('size'):
+                return None
+            if file_sha256(path) != entry.get('sha256'):
+                return None
+        except OSError:
+            return None
+        return path
+
+    def record_generation(self, title, lyrics, style, custom_mode, instrumental, model, output_path):
+        """Record in the generation manifest that a song was downloaded to output_path."""
+        key = self.job_key(title, lyrics, style, custom_mode, instrumental, model)
+        try:
+            entry = {
+                'path': output_path,
+                'size': os.stat(output_path).st_size,
+                'sha256': file_sha256(output_path)
+            }
+        except OSError as e:
+            print(f"Warning: could not update {GENERATION_MANIFEST}: {e}")
+            return
+        with self._manifest_lock:
+            manifest = self._load_manifest()
+            manifest[key] = entry
+            try:
+                os.makedirs(os.path.dirname(GENERATION_MANIFEST), exist_ok=True)
+                with open(GENERATION_MANIFEST + '.tmp', 'w') as f:
+                    f.write(format_json(manifest))
+                os.replace(GENERATION_MANIFEST + '.tmp', GENERATION_MANIFEST)
+            except OSError as e:
+                print(f"Warning: could not update {GENERATION_MANIFEST}: {e}")
+
+    def _load_manifest(self):
+        """Read the generation manifest, returning {} if absent or unreadable."""
+        try:
+            with open(GENERATION_MANIFEST, 'rb') as f:
+                return parse_json(f.read())
+        except (OSError, ValueError):
+            return {}
+
+    def start_callback_server(self, callback_url, port):
+        """
+        Listen for Suno's task callbacks so monitoring reacts to them at once.
+        
+        Status checks still back off as usual, but each wait ends early when
+        a callback arrives. callback_url must be a public URL that forwards
+        to this port (e.g. through a tunnel or reverse proxy).
+        
+        Args:
+            callback_url: URL Suno should send task callbacks to
+            port: Local port to listen on
+        """
+        server = http.server.ThreadingHTTPServer(('', port), CallbackHandler)
+        server.daemon_threads = True
+        server.notify_status = self.notify_status
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.callback_url = callback_url
+        print(f"Listening for Suno callbacks on port {port} ({callback_url})")
+
+    def status_event(self, task_id):
+        """Return the event set when a callback arrives for task_id."""
+        with self._status_events_lock:
+            event = self._status_events.get(task_id)
+            if event is None:
+                event = self._status_events[task_id] = threading.Event()
+            return event
+
+    def notify_status(self, task_id=None):
+        """
+        Wake the monitor of a task after a callback.
+        
+        Args:
+            task_id: Task the callback was for, or None to wake every monitor
+                when the callback didn't say
+        """
+        if task_id is not None:
+            self.status_event(task_id).set()
+            return
+        with self._status_events_lock:
+            events = list(self._status_events.values())
+        for event in events:
+            event.set()
+
+    def warm_up(self):
+        """
+        Open connections to the Suno and OpenAI APIs ahead of the first real request.
+        
+        Queries the credit balance, which leaves a kept-alive connection in
+        the session pool for generate_music to reuse. When DALL-E is enabled,
+        an unauthenticated HEAD does the same for the OpenAI host. Both go
+        through quick_session, so a failing endpoint is given up on at once
+        rather than retried. Meant to run on a daemon thread.
+        
+        Returns:
+            bool: True if the Suno API answered successfully, False otherwise
+        """
+        ok = False
+        try:
+            response = self.quick_session.get(f"{SUNO_API_BASE_URL}/credit/balance", headers=self.headers, timeout=5)
+            if response.status_code == 200:
+                logger.debug("Suno credit balance: %s", response.text)
+                ok = True
+            else:
+                print(f"Warning: Suno API warm-up returned status {response.status_code}")
+        except requests.exceptions.RequestException as e:
+            print(f"Warning: Suno API warm-up failed: {e}")
+        
+        if self.dalle_enabled:
+            # Any response will do; only the connection is wanted, so no key is sent
+            try:
+                self.quick_session.head(DALLE_API_URL, timeout=5)
+            except requests.exceptions.RequestException as e:
+                logger.debug("OpenAI API warm-up failed: %s", e)
+        return ok
 
     def generate_music(self, title, lyrics, style, custom_mode=True, instrumental=False, model="V3_5"):
         """
@@ -145,8 +966,16 @@ class MusicGenerator:
             model: Model version to use (V3_5 or V4)
             
         Returns:
-            dict: Response from Suno API containing task ID and other details
+            dict: Response from Suno API containing task ID and other details,
+                or {"cached": True, "output_path": ...} if an identical song
+                was already generated and downloaded
         """
+        # Skip Suno entirely if this exact song was made before
+        cached_path = self.find_generated(title, lyrics, style, custom_mode, instrumental, model)
+        if cached_path:
+            print(f"Reusing previously generated song: {cached_path}")
+            return {"cached": True, "output_path": cached_path}
+        
         # Truncate title if it exceeds 80 characters
         if len(title) > 80:
             print(f"Title is too long, truncating to 80 characters.")
@@ -160,33 +989,33 @@ class MusicGenerator:
             "customMode": custom_mode,
             "instrumental": instrumental,
             "model": model,
-            "callBackUrl": "https://example.com/callback"  # Placeholder, won't be used
+            "callBackUrl": self.callback_url
         }
         
         # Log request for debugging
-        print(f"Sending request to Suno API: {json.dumps(payload, indent=2)}")
-        print(f"API URL: {SUNO_API_BASE_URL}/generate")
+        print(f"Sending request to Suno API: {SUNO_API_BASE_URL}/generate")
+        logger.debug("Payload: %s", LazyJSON(payload))
         
-        # Make API request to generate audio
+        # Make API request to generate audio. The body is serialized up front
+        # (self.headers already sets the JSON content type).
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{SUNO_API_BASE_URL}/generate",
                 headers=self.headers,
-                json=payload,
+                data=encode_json(payload),
                 timeout=30  # Add timeout to prevent hanging
             )
             
             # Check for successful response
             if response.status_code == 200:
-                resp_json = response.json()
-                if self.debug:
-                    print(f"API Response: {json.dumps(resp_json, indent=2)}")
+                resp_json = parse_json(response.content)
+                logger.debug("API Response: %s", LazyJSON(resp_json))
 
                 # Extract task ID
                 task_id = resp_json.get('data', {}).get('taskId')
                 if not task_id:
                     print("Error: Task ID not found in response.")
-                    print(f"Full response: {json.dumps(resp_json, indent=2)}")
+                    print(f"Full response: {encode_json(resp_json).decode()}")
                     return None
 
                 return resp_json
@@ -196,7 +1025,7 @@ class MusicGenerator:
                 
                 # Try to parse as JSON to provide better error info
                 try:
-                    error_data = response.json()
+                    error_data = parse_json(response.content)
                     if 'code' in error_data and 'msg' in error_data:
                         print(f"API Error Code: {error_data['code']}")
                         print(f"Error Message: {error_data['msg']}")
@@ -232,7 +1061,11 @@ class MusicGenerator:
             print("Skipping video generation as VIDEO_API_KEY is not set.")
             return None
             
-        if not os.path.exists(audio_path) or os.path.getsize(audio_path) == 0:
+        try:
+            audio_size = os.stat(audio_path).st_size
+        except FileNotFoundError:
+            audio_size = 0
+        if not audio_size:
             print(f"Audio file not found or empty: {audio_path}")
             print("Skipping video generation.")
             return None
@@ -254,16 +1087,15 @@ class MusicGenerator:
         
         try:
             print("Sending request to DeepAI video generation API...")
-            if self.debug:
-                print(f"Video API URL: {video_api_url}")
-                print(f"Payload: {json.dumps(payload, indent=2)}")
+            logger.debug("Video API URL: %s", video_api_url)
+            logger.debug("Payload: %s", LazyJSON(payload))
             
             # Attempt to generate video
             with open(audio_path, 'rb') as audio_file:
                 files = {
                     'audio': audio_file
                 }
-                response = requests.post(
+                response = self.session.post(
                     video_api_url,
                     headers=headers,
                     data=payload,
@@ -275,10 +1107,10 @@ class MusicGenerator:
             
             if response.status_code == 200:
                 try:
-                    video_data = response.json()
+                    video_data = parse_json(response.content)
+                    video_log = LazyJSON(video_data)
                     print(f"Video generation response received.")
-                    if self.debug:
-                        print(f"Response data: {json.dumps(video_data, indent=2)}")
+                    logger.debug("Response data: %s", video_log)
                     
                     # Extract video URL from response
                     video_url = video_data.get("output_url")
@@ -287,8 +1119,7 @@ class MusicGenerator:
                         return video_url
                     else:
                         print("No video URL found in the response.")
-                        if self.debug:
-                            print(f"Full response: {json.dumps(video_data, indent=2)}")
+                        logger.debug("Full response: %s", video_log)
                         return None
                 except ValueError:
                     print("Invalid JSON response from video API.")
@@ -303,51 +1134,123 @@ class MusicGenerator:
             print(f"Network error during video generation: {e}")
             return None
 
-    def generate_images_with_dalle(self, prompt, num_images=5):
+    def generate_images_with_dalle(self, prompt, num_images=DALLE_NUM_IMAGES, image_prompts=None, output_dir=None):
         """
         Generate a series of images using OpenAI's DALL-E.
         
+        Up to DALLE_CONCURRENCY images are requested at once. Each image is
+        downloaded on a separate pool as soon as its URL arrives, so the
+        downloads overlap with the images still being generated.
+        
         Args:
-            prompt: Text prompt to generate images
+            prompt: Text prompt to generate images, also used to name the
+                output directory
             num_images: Number of images to generate
+            image_prompts: Optional list of per-image prompts (such as the
+                scene descriptions written with the lyrics), used in turn
+                instead of prompt
+            output_dir: Existing directory to save the images in; defaults
+                to a new artifacts/<prompt> directory
             
         Returns:
             List of file paths to the generated images
         """
-        import time
-        import os
-
-        # Create a directory for the prompt
-        prompt_dir = os.path.join("artifacts", prompt.replace(" ", "_"))
-        os.makedirs(prompt_dir, exist_ok=True)
+        # Create a directory for the prompt unless the caller has one
+        prompt_dir = output_dir
+        if prompt_dir is None:
+            prompt_dir = os.path.join("artifacts", prompt.replace(" ", "_"))
+            os.makedirs(prompt_dir, exist_ok=True)
 
-        image_paths = []
         headers = {
             "Authorization": f"Bearer {self.dalle_api_key}"
         }
         
-        for i in range(num_images):
+        # Image files are named after a hash of their prompt, so an image
+        # already generated for the same prompt is reused instead of paid for
+        # again
+        existing = {}
+        pending = {}
+        for number in range(1, num_images + 1):
+            image_prompt = image_prompts[(number - 1) % len(image_prompts)] if image_prompts else prompt
+            prompt_key = hashlib.sha256(image_prompt.encode()).hexdigest()[:16]
+            output_path = os.path.join(prompt_dir, f"{prompt_key}_{number}.png")
             try:
-                response = requests.post(
-                    "https://api.openai.com/v1/images/generations",
+                has_image = os.stat(output_path).st_size > 0
+            except FileNotFoundError:
+                has_image = False
+            if has_image:
+                print(f"Reusing existing image: {output_path}")
+                existing[number] = output_path
+            else:
+                pending[number] = (image_prompt, output_path)
+        
+        downloads = {}
+        with ThreadPoolExecutor(max_workers=max(1, len(pending))) as download_executor:
+            with ThreadPoolExecutor(max_workers=max(1, min(len(pending), DALLE_CONCURRENCY))) as executor:
+                futures = {
+                    executor.submit(self.generate_image, image_prompt, headers, number): number
+                    for number, (image_prompt, _) in pending.items()
+                }
+                for future in as_completed(futures):
+                    image_url = future.result()
+                    if image_url:
+                        number = futures[future]
+                        output_path = pending[number][1]
+                        downloads[number] = download_executor.submit(self.download_image, image_url, output_path)
+            
+            for number, download in downloads.items():
+                existing[number] = download.result()
+        
+        # Return the images in order, leaving out any that failed
+        return [existing[number] for number in sorted(existing) if existing[number]]
+
+    def generate_image(self, prompt, headers, number=1):
+        """
+        Generate one DALL-E image.
+        
+        Rate-limited (429) requests are retried after the delay the API asks
+        for, up to DALLE_RATE_LIMIT_RETRIES times.
+        
+        Args:
+            prompt: Text prompt to generate the image
+            headers: Request headers carrying the DALL-E API key
+            number: Image number, for progress messages
+            
+        Returns:
+            str: URL of the generated image, or None on failure
+        """
+        for attempt in range(DALLE_RATE_LIMIT_RETRIES + 1):
+            try:
+                response = self.session.post(
+                    DALLE_API_URL,
                     headers=headers,
-                    json={"prompt": prompt, "n": 1, "size": "1024x1024"}
+                    json={"prompt": prompt, "n": 1, "size": "1024x1024"},
+                    timeout=120
                 )
-                
-                if response.status_code == 200:
-                    image_data = response.json()
-                    image_url = image_data['data'][0]['url']
-                    image_path = self.download_image(image_url, os.path.join(prompt_dir, f"image_{i+1}.png"))
-                    image_paths.append(image_path)
-                else:
-                    print(f"Error generating image {i+1}: {response.status_code}")
-                
-                # Add delay to prevent hitting rate limits
-                time.sleep(2)
-            except Exception as e:
-                print(f"Exception occurred while generating image {i+1}: {e}")
+            except requests.exceptions.RequestException as e:
+                print(f"Exception occurred while generating image {number}: {e}")
+                return None
+            
+            if response.status_code == 429 and attempt < DALLE_RATE_LIMIT_RETRIES:
+                try:
+                    wait = float(response.headers.get('Retry-After', ''))
+                except ValueError:
+                    wait = 2 * (attempt + 1) * random.uniform(0.8, 1.2)
+                print(f"Rate limited on image {number}, retrying in {wait:.1f} seconds...")
+                time.sleep(wait)
+                continue
+            
+            if response.status_code != 200:
+                print(f"Error generating image {number}: {response.status_code}")
+                return None
+            
+            try:
+                return parse_json(response.content)['data'][0]['url']
+            except (ValueError, KeyError, IndexError, TypeError) as e:
+                print(f"Unexpected response for image {number}: {e}")
+                return None
         
-        return image_paths
+        return None
 
     def download_image(self, url, output_path):
         """
@@ -358,52 +1261,41 @@ class MusicGenerator:
             output_path: Path where to save the downloaded image
         """
         try:
-            response = requests.get(url, stream=True)
-            if response.status_code == 200:
-                with open(output_path, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        f.write(chunk)
-                print(f"Image downloaded successfully: {output_path}")
-                return output_path
-            else:
-                print(f"Failed to download image: {response.status_code}")
-                return None
+            with self.session.get(url, stream=True, timeout=60) as response:
+                if response.status_code == 200:
+                    # Copy straight from the raw stream, decoding any
+                    # transfer compression, without a Python-level loop
+                    response.raw.decode_content = True
+                    with open(output_path, 'wb') as f:
+                        shutil.copyfileobj(response.raw, f, DOWNLOAD_CHUNK_SIZE)
+                    print(f"Image downloaded successfully: {output_path}")
+                    return output_path
+                else:
+                    print(f"Failed to download image: {response.status_code}")
+                    return None
         except requests.exceptions.RequestException as e:
             print(f"Network error while downloading image: {e}")
             return None
 
-    def find_audio_url(self, obj):
+    def find_audio_url(self, obj, raw=None):
         """
-        Recursively search for audio URL in a nested JSON object.
+        Search for audio URL in a nested JSON object.
+        
+        When the raw response body is given it is scanned with a regex first,
+        and the object is only walked if that finds nothing.
         
         Args:
             obj: JSON object to search
+            raw: Raw response body bytes the object was parsed from
             
         Returns:
             str: Audio URL if found, None otherwise
         """
-        if isinstance(obj, dict):
-            # Direct field matches
-            for key in ['audioUrl', 'audio_url', 'url', 'mp3Url', 'streamUrl']:
-                if key in obj and isinstance(obj[key], str) and (
-                        obj[key].startswith('http') and 
-                        ('.mp3' in obj[key] or '.wav' in obj[key] or '/audio/' in obj[key])
-                    ):
-                    return obj[key]
-            
-            # Search recursively in all values
-            for k, v in obj.items():
-                result = self.find_audio_url(v)
-                if result:
-                    return result
-        
-        elif isinstance(obj, list):
-            for item in obj:
-                result = self.find_audio_url(item)
-                if result:
-                    return result
-        
-        return None
+        if raw:
+            match = AUDIO_URL_RE.search(raw)
+            if match:
+                return match.group(1).decode()
+        return walk_find(obj, AUDIO_URL_KEYS, is_audio_url)
     
     def check_generation_status(self, task_id):
         """
@@ -413,40 +1305,95 @@ class MusicGenerator:
             task_id: The task ID returned from generate_music
             
         Returns:
-            dict: Task details including status and results if available
+            tuple: (task details dict, raw response body bytes), or (None, None)
+                if every endpoint failed
         """
-        # The primary endpoint according to documentation
-        primary_endpoint = f"{SUNO_API_BASE_URL}/generate/record-info?taskId={task_id}"
-        print(f"Checking status at: {primary_endpoint}")
+        # Once an endpoint has answered, poll only that one; the others are
+        # only probed again if it stops working
+        if self.status_endpoint:
+            endpoint = self.status_endpoint.format(task_id=task_id)
+            # Logged at debug level only: this runs on every poll and the
+            # endpoint was already reported when it was found
+            logger.debug("Checking status at: %s", endpoint)
+            headers = self.headers
+            cached = self._status_cache.get(task_id)
+            if cached:
+                headers = dict(headers)
+                if cached['etag']:
+                    headers['If-None-Match'] = cached['etag']
+                if cached['last_modified']:
+                    headers['If-Modified-Since'] = cached['last_modified']
+            try:
+                response = self.session.get(endpoint, headers=headers, timeout=10)
+                if response.status_code == 304 and cached:
+                    logger.debug("Status unchanged (304 Not Modified)")
+                    return cached['details'], cached['raw']
+                if response.status_code == 200:
+                    return self._remember_status(task_id, response)
+                print(f"Status check failed with status {response.status_code}, trying all endpoints")
+            except requests.exceptions.RequestException as e:
+                print(f"Network error when checking status at {endpoint}: {e}")
+            self.status_endpoint = None
+        
+        endpoints = {template.format(task_id=task_id): template for template in SUNO_STATUS_ENDPOINTS}
+        print(f"Checking status at: {SUNO_STATUS_ENDPOINTS[0].format(task_id=task_id)} "
+              f"(and {len(endpoints) - 1} alternates)")
         
+        # Query every endpoint at once and use the first successful answer, so
+        # a slow or hung primary endpoint doesn't hold up the alternates. The
+        # probes don't retry (the next poll will), so each one ends within
+        # its timeout.
+        futures = {
+            self.status_executor.submit(self.quick_session.get, endpoint, headers=self.headers, timeout=10): endpoint
+            for endpoint in endpoints
+        }
         try:
-            response = requests.get(primary_endpoint, headers=self.headers, timeout=30)
-            if response.status_code == 200:
-                print("Status check successful")
-                return response.json()
-            
-            # If primary endpoint fails, try these alternative endpoints
-            alternate_endpoints = [
-                f"{SUNO_API_BASE_URL}/generate/status?taskId={task_id}",
-                f"{SUNO_API_BASE_URL}/generate/result?taskId={task_id}",
-                f"{SUNO_API_BASE_URL}/task/{task_id}",
-                f"{SUNO_API_BASE_URL}/generate/{task_id}"
-            ]
-            
-            for endpoint in alternate_endpoints:
-                print(f"Primary endpoint failed, trying: {endpoint}")
-                alt_response = requests.get(endpoint, headers=self.headers, timeout=30)
+            for future in as_completed(futures):
+                endpoint = futures[future]
+                try:
+                    response = future.result()
+                except requests.exceptions.RequestException as e:
+                    print(f"Network error when checking status at {endpoint}: {e}")
+                    continue
                 
-                if alt_response.status_code == 200:
-                    print(f"Success with alternate endpoint: {endpoint}")
-                    return alt_response.json()
-            
-            print("All endpoints failed for status check")
-            return None
+                if response.status_code == 200:
+                    print(f"Status check successful: {endpoint}")
+                    self.status_endpoint = endpoints[endpoint]
+                    return self._remember_status(task_id, response)
+        finally:
+            # Drop probes that haven't started. Running ones are not
+            # interrupted: they finish within their timeout, their results
+            # are ignored, and the executor waits for them at exit.
+            for future in futures:
+                future.cancel()
         
-        except requests.exceptions.RequestException as e:
-            print(f"Network error when checking status: {e}")
-            return None
+        print("All endpoints failed for status check")
+        return None, None
+    
+    def _remember_status(self, task_id, response):
+        """
+        Parse a status response and keep it for conditional re-polling.
+        
+        Args:
+            task_id: The task ID the response belongs to
+            response: Successful status response
+            
+        Returns:
+            tuple: (task details dict, raw response body bytes)
+        """
+        details = parse_json(response.content)
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if etag or last_modified:
+            self._status_cache[task_id] = {
+                'etag': etag,
+                'last_modified': last_modified,
+                'details': details,
+                'raw': response.content
+            }
+        else:
+            self._status_cache.pop(task_id, None)
+        return details, response.content
     
     def get_status_description(self, status_code):
         """
@@ -460,25 +1407,47 @@ class MusicGenerator:
         """
         return SUNO_STATUS.get(status_code, f"Unknown status: {status_code}")
     
-    def download_music(self, audio_url, output_path, max_retries=5):
+    def download_music(self, audio_url, output_path):
         """
-        Download the generated music to a local file with retry mechanism.
+        Download the generated music to a local file.
+        
+        Failed connections and retryable HTTP errors are retried by the
+        session's JitteredRetry before this method sees them; a body that
+        breaks off mid-transfer is retried here, up to DOWNLOAD_ATTEMPTS
+        times. Data is written to output_path + '.part' and only renamed into
+        place once complete, so an existing output_path is always a finished
+        download. The URL it came from is recorded next to it
+        (DOWNLOAD_SOURCE_SUFFIX), and the download is skipped only when that
+        URL matches.
         
         Args:
             audio_url: URL to the generated audio
             output_path: Path where to save the downloaded file
-            max_retries: Maximum number of retry attempts
             
         Returns:
             bool: True if download was successful, False otherwise
         """
-        retry_count = 0
-        while retry_count < max_retries:
+        # A file from an earlier run is kept only if it was downloaded from
+        # this same URL and hasn't changed size since. A file from any other
+        # song (e.g. an earlier run of the same theme) is replaced.
+        source_path = output_path + DOWNLOAD_SOURCE_SUFFIX
+        try:
+            with open(source_path, 'rb') as f:
+                source = parse_json(f.read())
+            if source.get('url') == audio_url and os.stat(output_path).st_size == source.get('size'):
+                print(f"Already downloaded: {output_path}")
+                return True
+        except (OSError, ValueError, AttributeError):
+            pass
+        
+        print(f"Downloading from {audio_url}")
+        tmp_path = output_path + '.part'
+        for attempt in range(1, DOWNLOAD_ATTEMPTS + 1):
+            partial = False
+            truncated = False
             try:
-                print(f"Download attempt {retry_count + 1}/{max_retries} from {audio_url}")
-                
                 # Try with streaming (better for large files)
-                with requests.get(audio_url, stream=True, timeout=60) as response:
+                with self.session.get(audio_url, stream=True, timeout=60) as response:
                     response.raise_for_status()
                     
                     # Get file size if available
@@ -486,46 +1455,110 @@ class MusicGenerator:
                     if file_size:
                         print(f"File size: {file_size / 1024 / 1024:.2f} MB")
                     
-                    # Download with progress tracking
-                    with open(output_path, 'wb') as f:
+                    # Download with progress tracking, updating at most every
+                    # PROGRESS_INTERVAL seconds rather than once per chunk.
+                    # Progress goes to stderr so piped stdout stays clean.
+                    # The MD5 is computed as the bytes arrive so the file never
+                    # has to be read back to verify it.
+                    md5 = hashlib.md5()
+                    partial = True
+                    with open(tmp_path, 'wb') as f:
+                        # Reserve the space up front so the file isn't grown
+                        # piecemeal as chunks arrive. Content-Length is only the
+                        # final size when the body isn't compressed in transit.
+                        exact_size = file_size if not response.headers.get('content-encoding') else 0
+                        if exact_size and hasattr(os, 'posix_fallocate'):
+                            os.posix_fallocate(f.fileno(), 0, exact_size)
                         downloaded = 0
-                        for chunk in response.iter_content(chunk_size=8192):
+                        last_report = 0.0
+                        for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
                             if chunk:
                                 f.write(chunk)
+                                md5.update(chunk)
                                 downloaded += len(chunk)
-                                if file_size:
+                                now = time.monotonic()
+                                if file_size and (now - last_report >= PROGRESS_INTERVAL or downloaded >= file_size):
+                                    last_report = now
                                     progress = (downloaded / file_size) * 100
-                                    print(f"\rProgress: {progress:.1f}%", end='')
-                    print("\nDownload complete!")
+                                    sys.stderr.write(f"\rProgress: {progress:.1f}%")
+                                    sys.stderr.flush()
+                    if file_size:
+                        sys.stderr.write("\n")
                     
-                    if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
-                        print(f"File saved to {output_path}")
-                        return True
-                    else:
-                        print("Downloaded file is empty. Retrying...")
-                
-            except Exception as e:
+                    if exact_size and downloaded != exact_size:
+                        truncated = True
+                        raise IOError(f"download truncated: got {downloaded} of {file_size} bytes")
+                    if not downloaded:
+                        raise IOError("downloaded file is empty")
+                    self.forget_download(output_path)
+                    os.replace(tmp_path, output_path)
+                    partial = False
+                    self._record_download_source(output_path, audio_url, downloaded)
+                    print("Download complete!")
+                    
+                    # Verify against the server's checksum when it provides one
+                    # (an ETag is the MD5 for single-part uploads on most CDNs)
+                    etag = response.headers.get('ETag', '').strip('"')
+                    content_md5 = response.headers.get('Content-MD5')
+                    if etag == md5.hexdigest() or content_md5 == base64.b64encode(md5.digest()).decode():
+                        print(f"Checksum verified: {md5.hexdigest()}")
+            except (requests.exceptions.RequestException, OSError) as e:
                 print(f"Download error: {e}")
-            
-            # Increase wait time between retries
-            wait_time = 2 ** retry_count
-            print(f"Retrying in {wait_time} seconds...")
-            time.sleep(wait_time)
-            retry_count += 1
+                # Don't leave a partial (possibly preallocated) file behind
+                if partial:
+                    try:
+                        os.remove(tmp_path)
+                    except FileNotFoundError:
+                        pass
+                # The session only retries getting the response, so a body
+                # that broke off mid-transfer is retried here
+                if attempt == DOWNLOAD_ATTEMPTS or not (truncated or isinstance(e, RETRYABLE_DOWNLOAD_ERRORS)):
+                    return False
+                wait = min(RETRY_BACKOFF_CAP, 2 ** attempt) * random.uniform(0.5, 1.5)
+                print(f"Retrying download ({attempt + 1}/{DOWNLOAD_ATTEMPTS}) in {wait:.1f} seconds...")
+                time.sleep(wait)
+            else:
+                break
         
-        return False
+        print(f"File saved to {output_path}")
+        return True
     
-    def monitor_and_download(self, task_id, output_path, title="", lyrics="", max_checks=30, check_interval=10):
+    def forget_download(self, output_path):
+        """Drop the record of where output_path was downloaded from, before it is replaced."""
+        try:
+            os.remove(output_path + DOWNLOAD_SOURCE_SUFFIX)
+        except FileNotFoundError:
+            pass
+    
+    def _record_download_source(self, output_path, audio_url, size):
+        """Note which URL output_path was downloaded from, so a re-run can skip it."""
+        try:
+            with open(output_path + DOWNLOAD_SOURCE_SUFFIX, 'wb') as f:
+                f.write(encode_json({'url': audio_url, 'size': size}))
+        except OSError as e:
+            print(f"Warning: could not record download source: {e}")
+    
+    def monitor_and_download(self, task_id, output_path, title="", lyrics="", max_checks=30,
+                             min_interval=2, max_interval=30, max_wait=None):
         """
         Monitor a task until completion and download the result.
         
+        Checks start min_interval seconds apart and back off by 1.5x per check
+        up to max_interval, with +/-20% jitter. Once Suno reports the lyrics
+        are done (TEXT_SUCCESS) the interval is held at 5 seconds or less,
+        since the audio usually follows shortly. A callback received by
+        start_callback_server ends the current wait early. Monitoring stops after
+        max_checks checks or max_wait seconds, whichever comes first.
+        
         Args:
             task_id: Task ID to monitor
             output_path: Where to save the downloaded file
             title: Song title (for video generation)
             lyrics: Song lyrics (for video generation)
             max_checks: Maximum number of status checks
-            check_interval: Seconds between checks
+            min_interval: Seconds before the first re-check
+            max_interval: Maximum seconds between checks
+            max_wait: Maximum total seconds to monitor for, or None for no limit
             
         Returns:
             bool: True if download was successful, False otherwise
@@ -534,18 +1567,40 @@ class MusicGenerator:
         print(f"Will save audio to: {output_path}")
         
         # Save task ID to a file for later use if needed
-        with open('last_task_id.txt', 'w') as f:
-            f.write(task_id)
+        fd = os.open('last_task_id.txt', os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.write(fd, task_id.encode())
+        finally:
+            os.close(fd)
         print(f"Task ID saved to last_task_id.txt")
         
+        deadline = time.monotonic() + max_wait if max_wait else None
+        
+        def wait_time(delay):
+            # Jitter the wait so parallel runs don't poll in lockstep, and
+            # never sleep past the deadline
+            wait = delay * random.uniform(0.8, 1.2)
+            if deadline is not None:
+                wait = max(0, min(wait, deadline - time.monotonic()))
+            return wait
+        
+        describe_status = SUNO_STATUS.get
+        status_changed = self.status_event(task_id)
+        delay = min_interval
         checks = 0
         while checks < max_checks:
+            if deadline is not None and time.monotonic() >= deadline:
+                print(f"Exceeded maximum wait of {max_wait:.0f} seconds.")
+                break
             print(f"\nCheck {checks + 1}/{max_checks}...")
             
-            task_details = self.check_generation_status(task_id)
+            # Waits below return early if a Suno callback arrives after this check
+            status_changed.clear()
+            task_details, raw_body = self.check_generation_status(task_id)
             if not task_details:
                 print("Could not retrieve task details, waiting before retry...")
-                time.sleep(check_interval)
+                status_changed.wait(wait_time(delay))
+                delay = min(max_interval, delay * 1.5)
                 checks += 1
                 continue
             
@@ -555,7 +1610,7 @@ class MusicGenerator:
                 error_msg = task_details.get('msg', 'Unknown error')
                 print(f"API error: {api_code} - {error_msg}")
                 
-                if api_code not in [200, 404]:  # 404 might be temporary
+                if api_code not in (200, 404):  # 404 might be temporary
                     return False
             
             # For proper error handling, first check the data object
@@ -571,68 +1626,46 @@ class MusicGenerator:
                 status = task_details.get('status')
                 
                 if not status:
-                    # Search recursively if needed
-                    def find_status(obj):
-                        if isinstance(obj, dict):
-                            if 'status' in obj:
-                                return obj['status']
-                            for k, v in obj.items():
-                                result = find_status(v)
-                                if result:
-                                    return result
-                        elif isinstance(obj, list):
-                            for item in obj:
-                                result = find_status(item)
-                                if result:
-                                    return result
-                        return None
-                    
-                    status = find_status(task_details)
+                    # Search the whole response if needed
+                    status = walk_find(task_details, STATUS_KEYS)
             
-            status_desc = self.get_status_description(status)
+            status_desc = describe_status(status) or f"Unknown status: {status}"
             print(f"Current status: {status} - {status_desc}")
             
             # When debugging, show the full response
-            if self.debug:
-                print("Full API response:")
-                print(json.dumps(task_details, indent=2))
+            logger.debug("Full API response:\n%s", LazyJSON(task_details))
             
             # Check for completion based on documented status codes
-            if status == 'SUCCESS' or status == 'FIRST_SUCCESS':
+            if status in SUNO_SUCCESS_STATUSES:
                 print("Task is complete!")
                 
                 # Find audio URL
-                audio_url = self.find_audio_url(task_details)
+                audio_url = self.find_audio_url(task_details, raw_body)
                 
                 if audio_url:
                     print(f"Found audio URL: {audio_url}")
-                    audio_success = self.download_music(audio_url, output_path)
-                    
-                    if audio_success and self.dalle_enabled and title:
-                        # Now that audio is downloaded, generate images
-                        print("\n=== Starting Image Generation ===")
-                        image_paths = self.generate_images_with_dalle(title)
-                        if image_paths:
-                            print("Images generated successfully.")
-                        return audio_success
-                    else:
-                        print("Image generation failed or not available, but audio was successful.")
-                    
-                    return audio_success
+                    return self.download_music(audio_url, output_path)
                 else:
                     print("No audio URL found in the response.")
             
-            elif status in ['CREATE_TASK_FAILED', 'GENERATE_AUDIO_FAILED', 'CALLBACK_EXCEPTION', 'SENSITIVE_WORD_ERROR']:
+            elif status in SUNO_FAILED_STATUSES:
                 print(f"Task failed: {status_desc}")
                 return False
             
-            elif status in ['PENDING', 'TEXT_SUCCESS']:
-                print(f"Task still processing ({status_desc}). Checking again in {check_interval} seconds...")
+            # Lyrics are done and audio is rendering, so completion is close
+            if status == 'TEXT_SUCCESS':
+                delay = min(delay, 5)
+            
+            wait = wait_time(delay)
+            if status in SUNO_WAITING_STATUSES:
+                print(f"Task still processing ({status_desc}). Checking again in {wait:.1f} seconds...")
             
             checks += 1
-            time.sleep(check_interval)
+            if status_changed.wait(wait):
+                print("Received a callback from Suno, checking now.")
+            delay = min(max_interval, delay * 1.5)
         
-        print("Exceeded maximum checks. Task may still be processing.")
+        print("Stopped monitoring. Task may still be processing.")
         print(f"You can check again later using: python main.py --check-task {task_id} --output {output_path}")
         return False
 
@@ -646,19 +1679,23 @@ class MusicGenerator:
             output_video_path: Path to save the generated video
             audio_path: Path to the audio file to include in the video
         """
-        from moviepy.editor import ImageClip, concatenate_videoclips, TextClip, CompositeVideoClip, AudioFileClip
+        from moviepy.editor import ImageClip, concatenate_videoclips, CompositeVideoClip, AudioFileClip
         
         # Create video clips from images
         clips = []
         for image_path in image_paths:
             clip = ImageClip(image_path).set_duration(3)  # Each image lasts 3 seconds
+            # Encoding cost grows with pixel count, so cap the frame width
+            if clip.w > VIDEO_MAX_WIDTH:
+                clip = clip.resize(width=VIDEO_MAX_WIDTH)
             clips.append(clip)
         
         # Concatenate image clips
         video = concatenate_videoclips(clips, method="compose")
         
-        # Create a text clip for lyrics
-        text_clip = TextClip(lyrics, fontsize=24, color='white', bg_color='black', size=video.size)
+        # Rasterize the lyrics once into a static overlay
+        overlay = self.render_lyrics_overlay(lyrics, video.w, video.h)
+        text_clip = ImageClip(overlay, transparent=True)
         text_clip = text_clip.set_duration(video.duration).set_position(('center', 'bottom'))
         
         # Overlay text on video
@@ -668,13 +1705,106 @@ class MusicGenerator:
         audio = AudioFileClip(audio_path)
         final_video = final_video.set_audio(audio)
         
-        # Write the video file
-        final_video.write_videofile(output_video_path, fps=24)
+        # Write the video file. A fast x264 preset on every core keeps the
+        # encode short; faststart lets players begin before the file loads.
+        final_video.write_videofile(
+            output_video_path,
+            fps=24,
+            codec='libx264',
+            preset='veryfast',
+            threads=os.cpu_count(),
+            audio_codec='aac',
+            ffmpeg_params=['-crf', '23', '-pix_fmt', 'yuv420p', '-movflags', '+faststart']
+        )
         print(f"Video created successfully: {output_video_path}")
 
+    def render_lyrics_overlay(self, lyrics, width, max_height, font_size=24):
+        """
+        Draw lyrics as white text on a translucent black band.
+        
+        The text is rendered once with Pillow rather than through
+        ImageMagick, so the video only composites a ready-made image.
+        
+        Args:
+            lyrics: Lyrics text to draw
+            width: Width of the overlay in pixels
+            max_height: Maximum height of the overlay in pixels
+            font_size: Font size in pixels
+            
+        Returns:
+            numpy.ndarray: RGBA image of the overlay
+        """
+        import numpy as np
+        from PIL import Image, ImageDraw, ImageFont
+        
+        try:
+            font = ImageFont.truetype("DejaVuSans.ttf", font_size)
+        except OSError:
+            font = ImageFont.load_default()
+        
+        # Measure the text, then size the band to fit it
+        padding = font_size // 2
+        measure = ImageDraw.Draw(Image.new("RGBA", (1, 1)))
+        left, top, right, bottom = measure.multiline_textbbox((0, 0), lyrics, font=font, align="center")
+        height = min(max_height, bottom - top + 2 * padding)
+        
+        overlay = Image.new("RGBA", (width, height), (0, 0, 0, 160))
+        draw = ImageDraw.Draw(overlay)
+        x = (width - (right - left)) // 2 - left
+        draw.multiline_text((x, padding - top), lyrics, font=font, fill=(255, 255, 255, 255), align="center")
+        return np.array(overlay)
+
+
+def read_last_task_id():
+    """Return the task ID saved by the last run, or None if there isn't one."""
+    try:
+        with open('last_task_id.txt', 'r') as f:
+            task_id = f.read().strip()
+    except FileNotFoundError:
+        return None
+    print(f"Using task ID from last_task_id.txt: {task_id}")
+    return task_id or None
+
+
+def check_task(task_id, output_path, music_gen=None, **monitor_kwargs):
+    """
+    Check an existing task and download its audio once it is complete.
+    
+    Args:
+        task_id: Task ID to check, or None to use the one in last_task_id.txt
+        output_path: Where to save the downloaded file
+        music_gen: MusicGenerator to use (defaults to a new one)
+        **monitor_kwargs: Extra arguments for monitor_and_download
+        
+    Returns:
+        bool: True if the audio was downloaded, False otherwise
+    """
+    if not task_id:
+        task_id = read_last_task_id()
+        if not task_id:
+            print("No task ID provided and no last_task_id.txt file found.")
+            return False
+    
+    if music_gen is None:
+        music_gen = MusicGenerator()
+    
+    print(f"Checking existing task: {task_id}")
+    return music_gen.monitor_and_download(task_id, output_path, **monitor_kwargs)
+
 
 def main():
     """Main function to orchestrate lyrics and music generation."""
+    # Load environment variables
+    from dotenv import load_dotenv
+    load_dotenv()
+    
+    # Re-checking a task (`main.py --check-task [TASK_ID]`) is often run in
+    # shell loops, so handle it without building the full argument parser
+    argv = sys.argv[1:]
+    if argv[:1] == ['--check-task'] and (len(argv) == 1 or (len(argv) == 2 and not argv[1].startswith('-'))):
+        check_task(argv[1] if len(argv) == 2 else None, DEFAULT_OUTPUT)
+        return
+    
     parser = argparse.ArgumentParser(description='Generate lyrics and music')
     parser.add_argument('--theme', type=str, help='Theme or idea for the song')
     parser.add_argument('--style', type=str, default='pop', help='Music style (e.g., rock, pop, rap)')
@@ -683,14 +1813,28 @@ def main():
     parser.add_argument('--custom', action='store_true', default=True, help='Use custom mode for Suno API')
     parser.add_argument('--instrumental', action='store_true', help='Generate instrumental music (no lyrics)')
     parser.add_argument('--model', type=str, default='V3_5', choices=['V3_5', 'V4'], help='Suno API model to use')
-    parser.add_argument('--output', type=str, default='output.mp3', help='Output file path')
+    parser.add_argument('--output', type=str, default=DEFAULT_OUTPUT, help='Output file path')
     parser.add_argument('--debug', action='store_true', help='Enable debug output')
     parser.add_argument('--checks', type=int, default=30, help='Maximum number of status checks')
-    parser.add_argument('--interval', type=int, default=10, help='Seconds between status checks')
+    parser.add_argument('--min-interval', type=float, default=2, help='Seconds before the first status re-check')
+    parser.add_argument('--max-interval', '--interval', dest='max_interval', type=float, default=30,
+                        help='Maximum seconds between status checks')
+    parser.add_argument('--max-wait', type=float, help='Stop monitoring after this many seconds (default: no limit)')
     parser.add_argument('--check-task', type=str, nargs='?', const=True, help='Check status of an existing task ID and download the result')
     parser.add_argument('--skip-images', action='store_true', help='Skip image generation even if DALLE_API_KEY is set')
+    parser.add_argument('--theme-batch', type=str, nargs='+', metavar='THEME',
+                        help='Generate a song for each of these themes, writing all the lyrics in one request')
+    parser.add_argument('--lyrics-model', type=str, default=LYRICS_MODEL, help='Claude model to use for lyrics')
+    parser.add_argument('--high-quality-lyrics', action='store_true',
+                        help=f'Use {HIGH_QUALITY_LYRICS_MODEL} for lyrics (slower and more expensive)')
+    parser.add_argument('--callback-url', type=str,
+                        help='Public URL Suno should send task callbacks to (forwarded to --callback-port)')
+    parser.add_argument('--callback-port', type=int, default=8765,
+                        help='Local port to receive Suno callbacks on when --callback-url is set')
+    parser.add_argument('--no-cache', action='store_true', help='Always generate new lyrics instead of reusing cached ones')
     
     args = parser.parse_args()
+    configure_logging(args.debug)
     
     # Create music generator instance
     music_gen = MusicGenerator(debug=args.debug)
@@ -700,58 +1844,127 @@ def main():
         music_gen.dalle_enabled = False
         print("Image generation disabled by command line argument.")
     
-    # If checking an existing task
+    # Let Suno's callbacks end status-check waits early
+    if args.callback_url:
+        music_gen.start_callback_server(args.callback_url, args.callback_port)
+    
+    # If checking an existing task (with no ID given, use the last one)
     if args.check_task:
-        task_id = args.check_task
-        if not os.path.exists(args.output):
-            print(f"Output file not found: {args.output}")
-            return
-        
-        print(f"Checking existing task: {task_id}")
-        music_gen.monitor_and_download(task_id, args.output)
+        task_id = args.check_task if isinstance(args.check_task, str) else None
+        check_task(
+            task_id,
+            args.output,
+            music_gen,
+            max_checks=args.checks,
+            min_interval=args.min_interval,
+            max_interval=args.max_interval,
+            max_wait=args.max_wait
+        )
         return
     
     # Ensure theme is provided for new music generation
-    if not args.theme:
+    if not args.theme and not args.theme_batch:
         print("ERROR: Theme is required for music generation.")
         return
     
-    # Generate lyrics
-    lyrics_gen = LyricsGenerator()
-    lyrics_response = lyrics_gen.generate_lyrics(args.theme, args.style, args.verses, args.chorus)
+    lyrics_gen = LyricsGenerator(debug=args.debug, cache_enabled=not args.no_cache)
+    lyrics_model = HIGH_QUALITY_LYRICS_MODEL if args.high_quality_lyrics else args.lyrics_model
+    # Scene descriptions for the images are written in the same request
+    num_image_prompts = DALLE_NUM_IMAGES if music_gen.dalle_enabled else 0
+    
+    # Warm up the API connections while the lyrics are being written. On a
+    # daemon thread, so a slow warm-up never delays generation or exit.
+    threading.Thread(target=music_gen.warm_up, daemon=True).start()
+    
+    # Write the lyrics for a batch of themes together, then produce the songs
+    # concurrently
+    if args.theme_batch:
+        themes = [args.theme] + args.theme_batch if args.theme else args.theme_batch
+        with ThreadPoolExecutor(max_workers=len(themes)) as executor:
+            all_lyrics = lyrics_gen.generate_lyrics_batch(
+                themes, args.style, args.verses, args.chorus, lyrics_model, num_image_prompts
+            )
+            song_futures = [
+                executor.submit(produce_song, music_gen, theme, lyrics, args)
+                for theme, lyrics in zip(themes, all_lyrics)
+            ]
+            for theme, future in zip(themes, song_futures):
+                if not future.result():
+                    print(f"Song for theme '{theme}' was not completed.")
+        return
+    
+    lyrics_response = lyrics_gen.generate_lyrics(
+        args.theme, args.style, args.verses, args.chorus, lyrics_model, num_image_prompts
+    )
+    produce_song(music_gen, args.theme, lyrics_response, args)
+
+
+def produce_song(music_gen, theme, lyrics_response, args):
+    """
+    Generate music for a set of lyrics, then download it and generate images.
+    
+    Args:
+        music_gen: MusicGenerator to use
+        theme: Theme the lyrics were written for, used to name the output directory
+        lyrics_response: Lyrics returned by LyricsGenerator.generate_lyrics
+        args: Parsed command line arguments
+        
+    Returns:
+        bool: True if the audio was downloaded, False otherwise
+    """
     lyrics_title = lyrics_response['title']
     lyrics_content = lyrics_response['content']
     
     # Create a directory for the prompt
-    prompt_dir = os.path.join("artifacts", args.theme.replace(" ", "_"))
+    prompt_dir = os.path.join("artifacts", theme.replace(" ", "_"))
     os.makedirs(prompt_dir, exist_ok=True)
     
+    output_path = os.path.join(prompt_dir, args.output)
+    job = (lyrics_title, lyrics_content, args.style, args.custom, args.instrumental, args.model)
+    
     # Generate music
-    music_gen_response = music_gen.generate_music(lyrics_title, lyrics_content, args.style, args.custom, args.instrumental, args.model)
-    task_id = music_gen_response.get('data', {}).get('taskId')
-    if not task_id:
-        print("Error: Task ID not found in response.")
-        print(f"Full response: {json.dumps(music_gen_response, indent=2)}")
-        return
-    print(f"Music generation started with task ID: {task_id}")
-    
-    # Monitor the task until completion and download
-    audio_success = music_gen.monitor_and_download(
-        task_id, 
-        os.path.join(prompt_dir, args.output), 
-        title=lyrics_title,
-        lyrics=lyrics_content,
-        max_checks=args.checks, 
-        check_interval=args.interval
-    )
+    music_gen_response = music_gen.generate_music(*job)
+    # generate_music has already reported why when it returns nothing
+    if not music_gen_response:
+        return False
+    cached = music_gen_response.get('cached')
+    if cached:
+        if os.path.abspath(music_gen_response['output_path']) != os.path.abspath(output_path):
+            music_gen.forget_download(output_path)
+            shutil.copyfile(music_gen_response['output_path'], output_path)
+    else:
+        task_id = music_gen_response['data']['taskId']
+        print(f"Music generation started with task ID: {task_id}")
     
-    # Generate images if audio was successful
-    if audio_success and not args.skip_images:
-        print("\n=== Starting Image Generation ===")
-        image_paths = music_gen.generate_images_with_dalle(lyrics_title)
-        if image_paths:
+    # Generate the images while Suno renders the audio rather than after it
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        images_future = None
+        if music_gen.dalle_enabled:
+            print("\n=== Starting Image Generation ===")
+            images_future = executor.submit(
+                music_gen.generate_images_with_dalle,
+                lyrics_title,
+                image_prompts=lyrics_response.get('image_prompts'),
+                output_dir=prompt_dir
+            )
+        
+        # Monitor the task until completion and download
+        audio_success = cached or music_gen.monitor_and_download(
+            task_id, 
+            output_path, 
+            title=lyrics_title,
+            lyrics=lyrics_content,
+            max_checks=args.checks, 
+            min_interval=args.min_interval,
+            max_interval=args.max_interval,
+            max_wait=args.max_wait
+        )
+        if audio_success and not cached:
+            music_gen.record_generation(*job, output_path)
+        
+        if images_future and images_future.result():
             print("Images generated successfully.")
-        return  # End the application after image generation
+    return audio_success
 
 
 if __name__ == "__main__":
@@ -3,96 +3,172 @@
 Simple test script to check Suno API connectivity.
 """
 import os
-import json
+import argparse
+import functools
 import requests
-from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
+from json_utils import parse_json, encode_json, format_json
 
-# Load environment variables
-load_dotenv()
+@functools.lru_cache(maxsize=1)
+def read_env_file(path=".env"):
+    """
+    Parse a .env file once into a dict of its KEY=value lines.
+    
+    Handles the simple forms this project uses: blank lines, # comments, an
+    optional "export " prefix and quoted values.
+    
+    Args:
+        path: Path to the .env file
+        
+    Returns:
+        dict: Variables defined in the file ({} if it doesn't exist)
+    """
+    values = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#') or '=' not in line:
+                    continue
+                if line.startswith('export '):
+                    line = line[len('export '):]
+                key, value = line.split('=', 1)
+                value = value.strip()
+                if len(value) >= 2 and value[0] == value[-1] and value[0] in '"\'':
+                    value = value[1:-1]
+                values[key.strip()] = value
+    except FileNotFoundError:
+        pass
+    return values
+
+# API key; like load_dotenv, a variable already set in the environment wins
+SUNO_API_KEY = os.getenv("SUNO_API_KEY") or read_env_file().get("SUNO_API_KEY")
 
-# API key
-SUNO_API_KEY = os.getenv("SUNO_API_KEY")
+# Masked key for display, e.g. "abcde...vwxyz". Keys too short to mask
+# without showing most of them are not printed at all.
+if not SUNO_API_KEY:
+    SUNO_API_KEY_HINT = "Not set"
+elif len(SUNO_API_KEY) >= 20:
+    SUNO_API_KEY_HINT = f"{SUNO_API_KEY[:5]}...{SUNO_API_KEY[-5:]}"
+else:
+    SUNO_API_KEY_HINT = f"<{len(SUNO_API_KEY)} characters>"
 
 # API base URL
 SUNO_API_BASE_URL = "https://apibox.erweima.ai/api/v1"
 
-def test_api_connection():
-    """Test basic connection to the Suno API."""
+# Cheap authenticated endpoint used as the health check (the same one
+# main.py uses to warm up its connection)
+HEALTH_URL = f"{SUNO_API_BASE_URL}/credit/balance"
+
+# Minimal generation request sent by --deep-check
+TEST_PAYLOAD = {
+    "prompt": "Test connection",
+    "style": "test",
+    "title": "API Test",
+    "customMode": True,
+    "instrumental": True,  # Instrumental mode for smaller/faster generation
+    "model": "V3_5"
+}
+
+# Request headers for the Suno API, built once
+AUTH_HEADERS = {
+    "Content-Type": "application/json",
+    "Accept": "application/json",
+    "Authorization": f"Bearer {SUNO_API_KEY}"
+} if SUNO_API_KEY else None
+
+# Shared session so the test requests reuse one kept-alive connection. Every
+# request goes to the Suno API, so the headers can live on the session.
+SESSION = requests.Session()
+if AUTH_HEADERS:
+    SESSION.headers.update(AUTH_HEADERS)
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=8,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=[429, 500, 502, 503, 504],
+        raise_on_status=False
+    )
+))
+
+def test_api_connection(deep_check=False):
+    """
+    Test basic connection to the Suno API.
+    
+    Args:
+        deep_check: Also send a minimal generation request, at the same time
+            as the balance check. This uses credits, so it is opt-in.
+    
+    Returns:
+        bool: True if any of the requests succeeded
+    """
     print("Testing Suno API connection...")
-    print(f"API Key: {SUNO_API_KEY[:5]}...{SUNO_API_KEY[-5:] if SUNO_API_KEY else 'Not set'}")
+    print(f"API Key: {SUNO_API_KEY_HINT}")
     
-    if not SUNO_API_KEY:
+    if not AUTH_HEADERS:
         print("ERROR: SUNO_API_KEY is not set in the .env file")
         return False
     
-    headers = {
-        "Content-Type": "application/json",
-        "Accept": "application/json",
-        "Authorization": f"Bearer {SUNO_API_KEY}"
-    }
-    
-    # Try a simple GET request first
-    try:
-        url = f"{SUNO_API_BASE_URL}/info"  # This endpoint may not exist, but let's try
-        print(f"Testing GET request to: {url}")
-        response = requests.get(url, headers=headers, timeout=10)
+    # Both requests are sent at once; results are printed in order afterwards
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        # There is no /info endpoint, so go straight to the credit balance
+        # check rather than probing for one
+        print(f"Testing GET request to: {HEALTH_URL}")
+        balance_future = executor.submit(SESSION.get, HEALTH_URL, timeout=10)
         
-        print(f"Status code: {response.status_code}")
-        print(f"Response: {response.text[:500]}")  # Show first 500 chars
+        gen_future = None
+        if deep_check:
+            gen_url = f"{SUNO_API_BASE_URL}/generate"
+            print(f"Testing POST request to: {gen_url}")
+            gen_future = executor.submit(SESSION.post, gen_url, data=encode_json(TEST_PAYLOAD), timeout=20)
         
-        # If that fails, let's try another endpoint
-        if response.status_code >= 400:
-            print("\nTrying alternative endpoint...")
-            alt_url = f"{SUNO_API_BASE_URL}/credit/balance"  # Try a credit balance check
-            print(f"Testing GET request to: {alt_url}")
-            alt_response = requests.get(alt_url, headers=headers, timeout=10)
+        success = False
+        try:
+            response = balance_future.result()
             
-            print(f"Status code: {alt_response.status_code}")
-            print(f"Response: {alt_response.text[:500]}")
+            print(f"Status code: {response.status_code}")
+            print(f"Response: {response.text[:500]}")  # Show first 500 chars
             
-            if alt_response.status_code == 200:
+            if response.status_code == 200:
                 print("\nSUCCESS: Successfully connected to the Suno API!")
                 try:
-                    data = alt_response.json()
-                    print(f"Credit balance: {json.dumps(data, indent=2)}")
-                except:
+                    data = parse_json(response.content)
+                    print(f"Credit balance: {format_json(data)}")
+                except ValueError:
                     pass
-                return True
-    except Exception as e:
-        print(f"ERROR: Exception occurred: {e}")
-    
-    # If we got here, let's try a simple POST request
-    try:
-        print("\nTrying a minimal generation request...")
-        payload = {
-            "prompt": "Test connection",
-            "style": "test",
-            "title": "API Test",
-            "customMode": True,
-            "instrumental": True,  # Instrumental mode for smaller/faster generation
-            "model": "V3_5"
-        }
+                success = True
+        except Exception as e:
+            print(f"ERROR: Exception occurred: {e}")
         
-        gen_url = f"{SUNO_API_BASE_URL}/generate"
-        print(f"Testing POST request to: {gen_url}")
-        gen_response = requests.post(
-            gen_url, 
-            headers=headers, 
-            json=payload,
-            timeout=20
-        )
+        if gen_future is None:
+            if not success:
+                print("\nRun with --deep-check to also try a minimal generation request (uses credits).")
+            return success
         
-        print(f"Status code: {gen_response.status_code}")
-        print(f"Response: {gen_response.text[:500]}")
-        
-        if gen_response.status_code == 200:
-            print("\nSUCCESS: Successfully sent a generation request!")
-            return True
-    except Exception as e:
-        print(f"ERROR: Exception occurred during generation test: {e}")
+        try:
+            print("\nMinimal generation request:")
+            gen_response = gen_future.result()
+            
+            print(f"Status code: {gen_response.status_code}")
+            print(f"Response: {gen_response.text[:500]}")
+            
+            if gen_response.status_code == 200:
+                print("\nSUCCESS: Successfully sent a generation request!")
+                success = True
+        except Exception as e:
+            print(f"ERROR: Exception occurred during generation test: {e}")
     
-    return False
+    return success
 
 if __name__ == "__main__":
-    success = test_api_connection()
+    parser = argparse.ArgumentParser(description='Test Suno API connectivity')
+    parser.add_argument('--deep-check', action='store_true',
+                        help='Also send a minimal generation request (uses credits)')
+    args = parser.parse_args()
+    
+    success = test_api_connection(args.deep_check)
     print("\nTest result:", "SUCCESS" if success else "FAILURE")